@@ -1,17 +1,43 @@
 # https://github.com/tatyam-prime/SortedSet/blob/main/BucketList.py
 import math
+from array import array
 from typing import Generic, Iterable, Iterator, TypeVar
 T = TypeVar('T')
 
 class BucketList(Generic[T]):
     BUCKET_RATIO = 16
     SPLIT_RATIO = 24
+    MERGE_RATIO = 4
+    counters = None
     
-    def __init__(self, a: Iterable[T] = []) -> None:
-        a = list(a)
-        n = self.size = len(a)
+    def __init__(self, a: Iterable[T] = [], typecode: str | None = None, bucket_ratio: int | None = None, split_ratio: int | None = None) -> None:
+        "Make a new BucketList from iterable. If typecode is given, the buckets are array.array of that typecode. bucket_ratio and split_ratio override BUCKET_RATIO and SPLIT_RATIO for this instance."
+        self.typecode = typecode
+        if bucket_ratio is not None: self.BUCKET_RATIO = bucket_ratio
+        if split_ratio is not None: self.SPLIT_RATIO = split_ratio
+        self._build(list(a))
+
+    def _build(self, a: list[T]) -> None:
+        "Rebuild the buckets from a list. a is emptied. / O(N)"
+        if self.typecode is not None and getattr(a, 'typecode', None) != self.typecode: a = array(self.typecode, a)
+        n = self.size = self.built_size = len(a)
         num_bucket = int(math.ceil(math.sqrt(n / self.BUCKET_RATIO)))
-        self.a = [a[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.a = []
+        for i in range(num_bucket - 1, -1, -1):
+            j = n * i // num_bucket
+            self.a.append(a[j:])
+            del a[j:]  # cut from the tail so that a and the buckets never both hold all the data
+        self.a.reverse()
+        self.tree = None
+        self.shared = set()
+
+    def _own(self, b: int) -> list[T]:
+        "Copy the b-th bucket if it may be shared with a copy, and return it. / O(bucket size)"
+        a = self.a[b]
+        if id(a) in self.shared:
+            self.shared.discard(id(a))
+            a = self.a[b] = a[:]
+        return a
 
     def __iter__(self) -> Iterator[T]:
         for i in self.a:
@@ -36,6 +62,19 @@ class BucketList(Generic[T]):
     def __str__(self) -> str:
         return str(list(self))
 
+    def __getstate__(self) -> dict:
+        "Pickle the buckets as they are. tree is recomputed when needed, and enable_stats() is not kept."
+        state = {k: v for k, v in self.__dict__.items() if not callable(v)}
+        state['tree'] = None
+        state['shared'] = set()
+        state.pop('counters', None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        "Restore the buckets. A state of the older format, holding only a and size, is accepted."
+        self.__dict__.update(typecode=None, tree=None, shared=set(), built_size=state['size'])
+        self.__dict__.update(state)
+
     def __contains__(self, x: T) -> bool:
         "Return True if x is in the bucket list. / O(N)"
         for y in self:
@@ -43,34 +82,81 @@ class BucketList(Generic[T]):
         return False
     
     def _insert(self, a: list[T], b: int, i: int, x: T) -> None:
+        if self.shared: a = self._own(b)
         a.insert(i, x)
         self.size += 1
         if len(a) > len(self.a) * self.SPLIT_RATIO:
             mid = len(a) >> 1
             self.a[b:b+1] = [a[:mid], a[mid:]]
+            self.tree = None
+        elif self.tree is not None: self._tree_add(b, 1)
+        if self.size > self.built_size << 1: self.rebalance()
+
+    def _build_tree(self) -> list[int]:
+        "Build a Fenwick tree over the sizes of the buckets. / O(√N)"
+        tree = [0]
+        tree += map(len, self.a)
+        n = len(tree)
+        for i in range(1, n):
+            j = i + (i & -i)
+            if j < n: tree[j] += tree[i]
+        self.tree = tree
+        return tree
+
+    def _tree_add(self, b: int, x: int) -> None:
+        "Add x to the size of the b-th bucket in the Fenwick tree. self.tree must not be None."
+        tree = self.tree
+        b += 1
+        while b < len(tree):
+            tree[b] += x
+            b += b & -b
+
+    def _count_before(self, b: int) -> int:
+        "Count the number of elements in the buckets before the b-th bucket. / O(log N)"
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        ans = 0
+        while b:
+            ans += tree[b]
+            b &= b - 1
+        return ans
+
+    def _locate(self, i: int) -> tuple[int, int]:
+        "return the index of the bucket and position of the i-th element. 0 <= i < size. / O(log N)"
+        a = self.a
+        if i < len(a[0]): return (0, i)
+        j = i - self.size + len(a[-1])
+        if j >= 0: return (len(a) - 1, j)
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        n = len(tree)
+        b = 0
+        k = 1 << (n - 1).bit_length() - 1
+        while k:
+            if b + k < n and tree[b + k] <= i:
+                b += k
+                i -= tree[b]
+            k >>= 1
+        return (b, i)
 
     def insert(self, i: int, x: T) -> None:
-        "Insert x at the i-th position. / O(√N)"
+        "Insert x at the i-th position. / O(log N + √N)"
         if self.size == 0:
             if i != 0 and i != -1: raise IndexError
-            self.a = [[x]]
-            self.size = 1
+            self._build([x])
             return
-        if i < 0:
-            for b, a in enumerate(reversed(self.a)):
-                i += len(a)
-                if i >= 0: return self._insert(a, len(self.a) + ~b, i, x)
-        else:
-            for b, a in enumerate(self.a):
-                if i <= len(a): return self._insert(a, b, i, x)
-                i -= len(a)
-        raise IndexError
+        if i < 0: i += self.size
+        if i < 0 or i > self.size: raise IndexError
+        if i == self.size:
+            b = len(self.a) - 1
+            i = len(self.a[b])
+        else: b, i = self._locate(i)
+        return self._insert(self.a[b], b, i, x)
 
     def append(self, x: T) -> None:
         "Append x to the end of the list. / amortized O(1)"
         if self.size == 0:
-            self.a = [[x]]
-            self.size = 1
+            self._build([x])
             return
         a = self.a[-1]
         return self._insert(a, len(self.a) - 1, len(a), x)
@@ -79,33 +165,103 @@ class BucketList(Generic[T]):
         for x in a: self.append(x)
     
     def __getitem__(self, i: int) -> T:
-        if i < 0:
-            for a in reversed(self.a):
-                i += len(a)
-                if i >= 0: return a[i]
-        else:
-            for a in self.a:
-                if i < len(a): return a[i]
-                i -= len(a)
-        raise IndexError
+        "Return the i-th element. / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self.a[b][i]
     
     def _pop(self, a: list[T], b: int, i: int) -> T:
+        if self.shared: a = self._own(b)
         ans = a.pop(i)
         self.size -= 1
-        if not a: del self.a[b]
+        if not a:
+            del self.a[b]
+            self.tree = None
+        elif len(a) < len(self.a) * self.MERGE_RATIO and len(self.a) > 1: self._merge_bucket(b)
+        elif self.tree is not None: self._tree_add(b, -1)
+        if self.size << 1 < self.built_size: self.rebalance()
         return ans
+
+    def rebalance(self) -> None:
+        "Rebuild the buckets for the current number of elements. / O(N)"
+        a = [] if self.typecode is None else array(self.typecode)
+        for c in self.a: a += c
+        self._build(a)
+
+    def _merge_bucket(self, b: int) -> None:
+        "Merge the b-th bucket with its smaller neighbour, and split the result in half if it is too large. len(self.a) >= 2."
+        if b == 0 or b + 1 < len(self.a) and len(self.a[b + 1]) < len(self.a[b - 1]): c = b
+        else: c = b - 1
+        a = self.a[c] + self.a[c + 1]
+        if len(a) > (len(self.a) - 1) * self.SPLIT_RATIO:
+            mid = len(a) >> 1
+            self.a[c:c+2] = [a[:mid], a[mid:]]
+        else: self.a[c:c+2] = [a]
+        self.tree = None
     
     def pop(self, i: int = -1) -> T:
-        "Remove and return the i-th element. / O(√N) / O(-i) if i < 0"
-        if i < 0:
-            for b, a in enumerate(reversed(self.a)):
-                i += len(a)
-                if i >= 0: return self._pop(a, ~b, i)
+        "Remove and return the i-th element. / O(log N + √N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self._pop(self.a[b], b, i)
+
+    def _delete(self, start: int, stop: int) -> int:
+        "Remove the elements in bl[start:stop] and return the number of removed elements. 0 <= start, stop <= size. / O(√N + K)"
+        if start >= stop: return 0
+        b, i = self._locate(start)
+        c, j = self._locate(stop - 1)
+        if self.shared:
+            self._own(b)
+            self._own(c)
+        a = self.a
+        if b == c: del a[b][i:j + 1]
         else:
-            for b, a in enumerate(self.a):
-                if i < len(a): return self._pop(a, b, i)
-                i -= len(a)
-        raise IndexError
+            del a[c][:j + 1]
+            del a[b][i:]
+            del a[b + 1:c]
+            if not a[b + 1]: del a[b + 1]
+        if not a[b]: del a[b]
+        self.size -= stop - start
+        self.tree = None
+        for k in (b + 1, b):
+            if k < len(a) and len(a[k]) < len(a) * self.MERGE_RATIO and len(a) > 1: self._merge_bucket(k)
+        if self.size << 1 < self.built_size: self.rebalance()
+        return stop - start
+
+    def __delitem__(self, i: int | slice) -> None:
+        "Remove the i-th element, or the elements in the slice i. / O(√N + K) if i is a slice with step 1"
+        if not isinstance(i, slice):
+            self.pop(i)
+            return
+        start, stop, step = i.indices(self.size)
+        if step == 1: self._delete(start, stop)
+        else:
+            for k in sorted(range(start, stop, step), reverse=True): self.pop(k)
+
+    def _walk(self, b: int, i: int, c: int, j: int, reverse: bool) -> Iterator[T]:
+        "Iterate from the i-th element of the b-th bucket to just before the j-th element of the c-th bucket."
+        if not reverse:
+            while b < c:
+                yield from self.a[b][i:]
+                b += 1
+                i = 0
+            if b == c: yield from self.a[b][i:j]
+        else:
+            while b < c:
+                yield from reversed(self.a[c][:j])
+                c -= 1
+                j = len(self.a[c])
+            if b == c: yield from reversed(self.a[b][i:j])
+
+    def islice(self, start: int | None = None, stop: int | None = None, reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements in s[start:stop] (in reverse order if reverse). / O(log N) + O(1) per element"
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop: return
+        b, i = self._locate(start)
+        c, j = self._locate(stop - 1)
+        yield from self._walk(b, i, c, j + 1, reverse)
 
     def count(self, x: T) -> int:
         "Return the number of occurrences of x. / O(N)"
@@ -123,11 +279,80 @@ class BucketList(Generic[T]):
 
     def clear(self) -> None:
         self.a = []
+        self.tree = None
         self.size = 0
 
     def reverse(self) -> None:
+        if self.shared:
+            for b in range(len(self.a)): self._own(b)
         self.a.reverse()
         for a in self.a: a.reverse()
+        self.tree = None
 
     def copy(self) -> 'BucketList[T]':
-        return BucketList(self)
+        "Return a copy that shares the buckets with self. A shared bucket is copied when either side first modifies it. / O(√N)"
+        ans = type(self).__new__(type(self))
+        ans.__dict__.update(self.__getstate__())
+        ans.a = self.a[:]
+        if self.tree is not None: ans.tree = self.tree[:]
+        ans.shared = set(map(id, self.a))
+        self.shared = set(ans.shared)
+        return ans
+
+    def snapshot(self) -> 'BucketList[T]':
+        "Same as copy(). Take one for consistent reads while self keeps changing. / O(√N)"
+        return self.copy()
+
+    def enable_stats(self) -> None:
+        "Start counting structural events in self.counters, or reset the counters if already started. The counting methods are set on this instance only, so other instances run at full speed."
+        if self.counters is not None:
+            for k in self.counters: self.counters[k] = 0
+            return
+        c = self.counters = dict.fromkeys(('lookups', 'buckets_visited', 'tree_steps', 'shifted', 'splits', 'merges', 'bucket_deletions', 'rebuilds', 'tree_builds'), 0)
+        cls = type(self)
+
+        def _locate(i):
+            c['lookups'] += 1
+            c['buckets_visited'] += 1
+            if len(self.a[0]) <= i < self.size - len(self.a[-1]): c['tree_steps'] += len(self.a).bit_length()
+            return cls._locate(self, i)
+
+        def _insert(a, b, i, x):
+            c['shifted'] += len(a) - i
+            if len(a) >= len(self.a) * self.SPLIT_RATIO: c['splits'] += 1
+            return cls._insert(self, a, b, i, x)
+
+        def _pop(a, b, i):
+            c['shifted'] += len(a) - 1 - i
+            if len(a) == 1: c['bucket_deletions'] += 1
+            return cls._pop(self, a, b, i)
+
+        def _merge_bucket(b):
+            c['merges'] += 1
+            return cls._merge_bucket(self, b)
+
+        def _build(a):
+            c['rebuilds'] += 1
+            return cls._build(self, a)
+
+        def _build_tree():
+            c['tree_builds'] += 1
+            return cls._build_tree(self)
+
+        for f in (_locate, _insert, _pop, _merge_bucket, _build, _build_tree):
+            setattr(self, f.__name__, f)
+
+    def disable_stats(self) -> None:
+        "Stop counting and remove the counting methods from this instance."
+        for name in ('_locate', '_insert', '_pop', '_merge_bucket', '_build', '_build_tree', 'counters'):
+            self.__dict__.pop(name, None)
+
+    def stats(self) -> dict:
+        "Return the number of elements and buckets, a histogram {2^k: number of buckets whose size is in [2^k, 2^(k+1))} and the counters of enable_stats() if started. / O(√N)"
+        histogram = {}
+        for a in self.a:
+            k = 1 << len(a).bit_length() - 1
+            histogram[k] = histogram.get(k, 0) + 1
+        ans = {'size': self.size, 'buckets': len(self.a), 'histogram': dict(sorted(histogram.items()))}
+        if self.counters is not None: ans.update(self.counters)
+        return ans
@@ -0,0 +1,175 @@
+import threading
+from typing import Generic, Iterable, Iterator, TypeVar
+from SortedSet import SortedSet
+from SortedMultiset import SortedMultiset
+T = TypeVar('T')
+
+class RWLock:
+    "A reader/writer lock: any number of readers or one writer. A waiting writer blocks new readers."
+
+    class Guard:
+        def __init__(self, acquire, release) -> None:
+            self.acquire = acquire
+            self.release = release
+
+        def __enter__(self) -> None:
+            self.acquire()
+
+        def __exit__(self, *args) -> None:
+            self.release()
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting = 0
+        self.read = self.Guard(self.acquire_read, self.release_read)
+        self.write = self.Guard(self.acquire_write, self.release_write)
+
+    def acquire_read(self) -> None:
+        with self.cond:
+            while self.writer or self.waiting: self.cond.wait()
+            self.readers += 1
+
+    def release_read(self) -> None:
+        with self.cond:
+            self.readers -= 1
+            if not self.readers: self.cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self.cond:
+            self.waiting += 1
+            while self.writer or self.readers: self.cond.wait()
+            self.waiting -= 1
+            self.writer = True
+
+    def release_write(self) -> None:
+        with self.cond:
+            self.writer = False
+            self.cond.notify_all()
+
+
+class ConcurrentSortedSet(Generic[T]):
+    "A SortedSet that can be shared between threads. Queries run concurrently, modifications run one at a time, and iteration runs over a snapshot. Paste SortedSet before this class."
+
+    def __init__(self, a: Iterable[T] = [], **kwargs) -> None:
+        "Make a new ConcurrentSortedSet. kwargs are passed to SortedSet."
+        self.s = SortedSet(a, **kwargs)
+        self.lock = RWLock()
+
+    def snapshot(self) -> SortedSet[T]:
+        "Return a copy-on-write copy of the current contents, which later modifications don't affect. / O(√N)"
+        with self.lock.write: return self.s.snapshot()
+
+    def batch(self) -> 'ConcurrentSortedSet.Batch':
+        "Hold the write lock for a batch of operations: with cs.batch() as s: ... where s is the underlying SortedSet."
+        return self.Batch(self)
+
+    class Batch:
+        def __init__(self, cs: 'ConcurrentSortedSet') -> None:
+            self.cs = cs
+
+        def __enter__(self) -> SortedSet:
+            self.cs.lock.acquire_write()
+            return self.cs.s
+
+        def __exit__(self, *args) -> None:
+            self.cs.lock.release_write()
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.snapshot())
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self.snapshot())
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+    def __repr__(self) -> str:
+        return "Concurrent" + repr(self.snapshot())
+
+    def __str__(self) -> str:
+        return str(self.snapshot())
+
+    def __contains__(self, x: T) -> bool:
+        with self.lock.read: return x in self.s
+
+    def __getitem__(self, i: int) -> T:
+        with self.lock.read: return self.s[i]
+
+    def lt(self, x: T) -> T | None:
+        with self.lock.read: return self.s.lt(x)
+
+    def le(self, x: T) -> T | None:
+        with self.lock.read: return self.s.le(x)
+
+    def gt(self, x: T) -> T | None:
+        with self.lock.read: return self.s.gt(x)
+
+    def ge(self, x: T) -> T | None:
+        with self.lock.read: return self.s.ge(x)
+
+    def index(self, x: T) -> int:
+        with self.lock.read: return self.s.index(x)
+
+    def index_right(self, x: T) -> int:
+        with self.lock.read: return self.s.index_right(x)
+
+    def contains_many(self, q: Iterable[T]) -> list[bool]:
+        with self.lock.read: return self.s.contains_many(q)
+
+    def index_many(self, q: Iterable[T]) -> list[int]:
+        with self.lock.read: return self.s.index_many(q)
+
+    def index_right_many(self, q: Iterable[T]) -> list[int]:
+        with self.lock.read: return self.s.index_right_many(q)
+
+    def irange(self, lo: T | None = None, hi: T | None = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements between lo and hi of a snapshot."
+        return self.snapshot().irange(lo, hi, inclusive, reverse)
+
+    def islice(self, start: int | None = None, stop: int | None = None, reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements in s[start:stop] of a snapshot."
+        return self.snapshot().islice(start, stop, reverse)
+
+    def add(self, x: T) -> bool:
+        with self.lock.write: return self.s.add(x)
+
+    def discard(self, x: T) -> bool:
+        with self.lock.write: return self.s.discard(x)
+
+    def pop(self, i: int = -1) -> T:
+        with self.lock.write: return self.s.pop(i)
+
+    def __delitem__(self, i: int | slice) -> None:
+        with self.lock.write: del self.s[i]
+
+    def discard_range(self, lo: T | None = None, hi: T | None = None, inclusive: tuple[bool, bool] = (True, True)) -> int:
+        with self.lock.write: return self.s.discard_range(lo, hi, inclusive)
+
+    def update(self, a: Iterable[T]) -> None:
+        "Add all elements of iterable, taking the lock once."
+        a = list(a)
+        with self.lock.write: self.s.update(a)
+
+    def add_many(self, a: Iterable[T]) -> list[bool]:
+        "Return [cs.add(x) for x in a], taking the lock once."
+        a = list(a)
+        with self.lock.write: return [self.s.add(x) for x in a]
+
+    def discard_many(self, a: Iterable[T]) -> list[bool]:
+        "Return [cs.discard(x) for x in a], taking the lock once."
+        a = list(a)
+        with self.lock.write: return [self.s.discard(x) for x in a]
+
+
+class ConcurrentSortedMultiset(ConcurrentSortedSet[T]):
+    "A SortedMultiset that can be shared between threads. Paste SortedMultiset and ConcurrentSortedSet before this class."
+
+    def __init__(self, a: Iterable[T] = [], **kwargs) -> None:
+        "Make a new ConcurrentSortedMultiset. kwargs are passed to SortedMultiset."
+        self.s = SortedMultiset(a, **kwargs)
+        self.lock = RWLock()
+
+    def count(self, x: T) -> int:
+        with self.lock.read: return self.s.count(x)
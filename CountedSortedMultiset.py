@@ -0,0 +1,255 @@
+import math
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, repeat
+from typing import Generic, Iterable, Iterator, TypeVar
+T = TypeVar('T')
+
+class CountedSortedMultiset(Generic[T]):
+    BUCKET_RATIO = 16
+    SPLIT_RATIO = 24
+
+    def __init__(self, a: Iterable[T] = []) -> None:
+        "Make a new CountedSortedMultiset from iterable. / O(N) if sorted / O(N log N)"
+        a = list(a)
+        n = len(a)
+        if any(a[i] > a[i + 1] for i in range(n - 1)):
+            a.sort()
+        v, c = [], []
+        for x in a:
+            if v and v[-1] == x: c[-1] += 1
+            else:
+                v.append(x)
+                c.append(1)
+        self._build(v, c)
+
+    def _build(self, v: list[T], c: list[int]) -> None:
+        "Rebuild the buckets from a sorted list of distinct values and their counts. / O(D)"
+        n = self.distinct = len(v)
+        self.size = sum(c)
+        num_bucket = int(math.ceil(math.sqrt(n / self.BUCKET_RATIO)))
+        self.a = [v[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.c = [c[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.maxes = [a[-1] for a in self.a]
+        self.sums = [sum(c) for c in self.c]
+        self.tree = None
+
+    def __iter__(self) -> Iterator[T]:
+        for a, c in zip(self.a, self.c):
+            for x, k in zip(a, c): yield from repeat(x, k)
+
+    def __reversed__(self) -> Iterator[T]:
+        for a, c in zip(reversed(self.a), reversed(self.c)):
+            for x, k in zip(reversed(a), reversed(c)): yield from repeat(x, k)
+
+    def items(self) -> Iterator[tuple[T, int]]:
+        "Iterate over the pairs (value, count) in ascending order of value."
+        for a, c in zip(self.a, self.c):
+            yield from zip(a, c)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return "CountedSortedMultiset" + str([list(zip(a, c)) for a, c in zip(self.a, self.c)])
+
+    def __str__(self) -> str:
+        s = str(list(self))
+        return "{" + s[1 : len(s) - 1] + "}"
+
+    def num_distinct(self) -> int:
+        "Count the number of distinct elements. / O(1)"
+        return self.distinct
+
+    def _position(self, x: T) -> tuple[list[T], int, int]:
+        "return the bucket, index of the bucket and position in which x should be. self must not be empty."
+        i = bisect_left(self.maxes, x)
+        if i == len(self.a): i -= 1
+        a = self.a[i]
+        return (a, i, bisect_left(a, x))
+
+    def __contains__(self, x: T) -> bool:
+        if self.size == 0: return False
+        a, _, i = self._position(x)
+        return i != len(a) and a[i] == x
+
+    def count(self, x: T) -> int:
+        "Count the number of x. / O(log N)"
+        if self.size == 0: return 0
+        a, b, i = self._position(x)
+        if i == len(a) or a[i] != x: return 0
+        return self.c[b][i]
+
+    def add(self, x: T, k: int = 1) -> None:
+        "Add k copies of an element. / O(log N) if x is already in self / O(√D)"
+        if k <= 0: return
+        if self.size == 0:
+            self.a = [[x]]
+            self.c = [[k]]
+            self.maxes = [x]
+            self.sums = [k]
+            self.tree = None
+            self.size = k
+            self.distinct = 1
+            return
+        a, b, i = self._position(x)
+        self.size += k
+        self.sums[b] += k
+        if self.tree is not None: self._tree_add(b, k)
+        c = self.c[b]
+        if i != len(a) and a[i] == x:
+            c[i] += k
+            return
+        a.insert(i, x)
+        c.insert(i, k)
+        self.distinct += 1
+        if i == len(a) - 1: self.maxes[b] = x
+        if len(a) > len(self.a) * self.SPLIT_RATIO:
+            mid = len(a) >> 1
+            self.a[b:b+1] = [a[:mid], a[mid:]]
+            self.c[b:b+1] = [c[:mid], c[mid:]]
+            self.maxes.insert(b, a[mid - 1])
+            self.sums[b:b+1] = [sum(c[:mid]), sum(c[mid:])]
+            self.tree = None
+
+    def _pop(self, a: list[T], b: int, i: int, k: int) -> T:
+        "Remove k copies of a[i]. 0 < k <= count."
+        ans = a[i]
+        c = self.c[b]
+        self.size -= k
+        self.sums[b] -= k
+        c[i] -= k
+        if c[i]:
+            if self.tree is not None: self._tree_add(b, -k)
+            return ans
+        del a[i]
+        del c[i]
+        self.distinct -= 1
+        if not a:
+            del self.a[b]
+            del self.c[b]
+            del self.maxes[b]
+            del self.sums[b]
+            self.tree = None
+            return ans
+        if i == len(a): self.maxes[b] = a[-1]
+        if self.tree is not None: self._tree_add(b, -k)
+        return ans
+
+    def _build_tree(self) -> list[int]:
+        "Build a Fenwick tree over the total counts of the buckets. / O(√D)"
+        tree = [0]
+        tree += self.sums
+        n = len(tree)
+        for i in range(1, n):
+            j = i + (i & -i)
+            if j < n: tree[j] += tree[i]
+        self.tree = tree
+        return tree
+
+    def _tree_add(self, b: int, x: int) -> None:
+        "Add x to the total count of the b-th bucket in the Fenwick tree. self.tree must not be None."
+        tree = self.tree
+        b += 1
+        while b < len(tree):
+            tree[b] += x
+            b += b & -b
+
+    def _count_before(self, b: int) -> int:
+        "Count the number of elements in the buckets before the b-th bucket. / O(log D)"
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        ans = 0
+        while b:
+            ans += tree[b]
+            b &= b - 1
+        return ans
+
+    def _locate(self, i: int) -> tuple[int, int]:
+        "return the index of the bucket and position of the i-th element. 0 <= i < size. / O(log D + √D)"
+        sums = self.sums
+        if i < sums[0]: b = 0
+        elif i >= self.size - sums[-1]:
+            b = len(sums) - 1
+            i -= self.size - sums[-1]
+        else:
+            tree = self.tree
+            if tree is None: tree = self._build_tree()
+            n = len(tree)
+            b = 0
+            k = 1 << (n - 1).bit_length() - 1
+            while k:
+                if b + k < n and tree[b + k] <= i:
+                    b += k
+                    i -= tree[b]
+                k >>= 1
+        return (b, bisect_right(list(accumulate(self.c[b])), i))
+
+    def discard(self, x: T, k: int = 1) -> int:
+        "Remove up to k copies of an element and return the number of removed copies. / O(log N) if some copies remain / O(√D)"
+        if self.size == 0 or k <= 0: return 0
+        a, b, i = self._position(x)
+        if i == len(a) or a[i] != x: return 0
+        k = min(k, self.c[b][i])
+        self._pop(a, b, i, k)
+        return k
+
+    def lt(self, x: T) -> T | None:
+        "Find the largest element < x, or None if it doesn't exist."
+        b = bisect_left(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            i = bisect_left(a, x)
+            if i: return a[i - 1]
+        if b: return self.maxes[b - 1]
+
+    def le(self, x: T) -> T | None:
+        "Find the largest element <= x, or None if it doesn't exist."
+        b = bisect_right(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            i = bisect_right(a, x)
+            if i: return a[i - 1]
+        if b: return self.maxes[b - 1]
+
+    def gt(self, x: T) -> T | None:
+        "Find the smallest element > x, or None if it doesn't exist."
+        b = bisect_right(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            return a[bisect_right(a, x)]
+
+    def ge(self, x: T) -> T | None:
+        "Find the smallest element >= x, or None if it doesn't exist."
+        b = bisect_left(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            return a[bisect_left(a, x)]
+
+    def __getitem__(self, i: int) -> T:
+        "Return the i-th element. / O(log D + √D)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self.a[b][i]
+
+    def pop(self, i: int = -1) -> T:
+        "Pop and return the i-th element. / O(log D + √D)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self._pop(self.a[b], b, i, 1)
+
+    def index(self, x: T) -> int:
+        "Count the number of elements < x. / O(log D + √D)"
+        b = bisect_left(self.maxes, x)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + sum(self.c[b][:bisect_left(self.a[b], x)])
+
+    def index_right(self, x: T) -> int:
+        "Count the number of elements <= x. / O(log D + √D)"
+        b = bisect_right(self.maxes, x)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + sum(self.c[b][:bisect_right(self.a[b], x)])
@@ -0,0 +1,123 @@
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator
+
+class MappedSortedSet:
+    "A read-only SortedSet over a file written by SortedSet.dump(). The elements stay in the page cache and are shared between processes."
+    HEADER = struct.Struct('<4sBc2xQ')  # same as SortedSet.HEADER
+    INDEX_STEP = 64
+
+    def __init__(self, path: str, index_step: int | None = None) -> None:
+        "Map the file at path. Every index_step-th element is copied into memory as a sparse index. / O(N / index_step)"
+        if sys.byteorder == 'big': raise ValueError('the file is little-endian')
+        if index_step is not None: self.INDEX_STEP = index_step
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, tc, n = self.HEADER.unpack_from(self.mm)
+        if magic not in (b'SSet', b'SMul'):
+            self.mm.close()
+            raise ValueError('not a SortedSet file')
+        self.typecode = tc.decode()
+        start = self.HEADER.size
+        self.a = memoryview(self.mm)[start : start + n * array(self.typecode).itemsize].cast(self.typecode)
+        self.size = n
+        self.sparse = array(self.typecode, self.a[::self.INDEX_STEP].tobytes())
+
+    def close(self) -> None:
+        "Unmap the file. Iterators in progress raise ValueError when resumed."
+        self.a.release()
+        self.mm.close()
+
+    def __enter__(self) -> 'MappedSortedSet':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator:
+        return iter(self.a)
+
+    def __reversed__(self) -> Iterator:
+        a = self.a
+        for i in range(self.size - 1, -1, -1): yield a[i]
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"MappedSortedSet(typecode={self.typecode!r}, size={self.size})"
+
+    def __str__(self) -> str:
+        s = str(list(self))
+        return "{" + s[1 : len(s) - 1] + "}"
+
+    def _bisect_left(self, x) -> int:
+        "Count the number of elements < x: bisect the sparse index, then one block of the file. / O(log N)"
+        b = bisect_left(self.sparse, x)
+        if b == 0: return 0
+        k = self.INDEX_STEP
+        return bisect_left(self.a, x, (b - 1) * k + 1, min(b * k, self.size))
+
+    def _bisect_right(self, x) -> int:
+        "Count the number of elements <= x. / O(log N)"
+        b = bisect_right(self.sparse, x)
+        if b == 0: return 0
+        k = self.INDEX_STEP
+        return bisect_right(self.a, x, (b - 1) * k + 1, min(b * k, self.size))
+
+    def __contains__(self, x) -> bool:
+        i = self._bisect_left(x)
+        return i != self.size and self.a[i] == x
+
+    def lt(self, x):
+        "Find the largest element < x, or None if it doesn't exist."
+        i = self._bisect_left(x)
+        if i: return self.a[i - 1]
+
+    def le(self, x):
+        "Find the largest element <= x, or None if it doesn't exist."
+        i = self._bisect_right(x)
+        if i: return self.a[i - 1]
+
+    def gt(self, x):
+        "Find the smallest element > x, or None if it doesn't exist."
+        i = self._bisect_right(x)
+        if i != self.size: return self.a[i]
+
+    def ge(self, x):
+        "Find the smallest element >= x, or None if it doesn't exist."
+        i = self._bisect_left(x)
+        if i != self.size: return self.a[i]
+
+    def __getitem__(self, i: int):
+        "Return the i-th element. / O(1)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        return self.a[i]
+
+    def index(self, x) -> int:
+        "Count the number of elements < x."
+        return self._bisect_left(x)
+
+    def index_right(self, x) -> int:
+        "Count the number of elements <= x."
+        return self._bisect_right(x)
+
+    def islice(self, start: int | None = None, stop: int | None = None, reverse: bool = False) -> Iterator:
+        "Iterate over the elements in s[start:stop] (in reverse order if reverse). / O(1) + O(1) per element"
+        start, stop, _ = slice(start, stop).indices(self.size)
+        a = self.a
+        r = range(start, stop) if not reverse else range(stop - 1, start - 1, -1)
+        for i in r: yield a[i]  # no slice view, so that close() can unmap the file while this is suspended
+
+    def irange(self, lo=None, hi=None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator:
+        "Iterate over the elements between lo and hi in ascending order (descending if reverse). None means unbounded. / O(log N) + O(1) per element"
+        i = 0 if lo is None else self._bisect_left(lo) if inclusive[0] else self._bisect_right(lo)
+        j = self.size if hi is None else self._bisect_right(hi) if inclusive[1] else self._bisect_left(hi)
+        return self.islice(i, j, reverse)
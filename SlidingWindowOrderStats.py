@@ -0,0 +1,85 @@
+from collections import deque
+from fractions import Fraction
+from typing import Generic, Iterable, Iterator, TypeVar
+from SortedMultiset import SortedMultiset
+T = TypeVar('T')
+
+class SlidingWindowOrderStats(Generic[T]):
+    "The K-th smallest element and the sum of the K smallest elements of a sliding window, kept in two SortedMultisets. Paste SortedMultiset before this class."
+
+    def __init__(self, size: int | None = None, k: int | None = None, q: float | None = None) -> None:
+        "Make an empty window. If size is given, push() evicts the oldest element when the window is full. Give either k, or a quantile 0 < q <= 1 for K = ceil(q * (number of elements))."
+        if (k is None) == (q is None): raise ValueError('give either k or q')
+        self.size = size
+        self.k = k
+        self.q = q
+        if q is not None: self.num, self.den = Fraction(str(q)).as_integer_ratio()  # exact, so that ceil(0.07 * 100) == 7
+        self.window = deque()
+        self.low = SortedMultiset()  # the K smallest elements
+        self.high = SortedMultiset()  # the other elements
+        self.low_sum = 0
+
+    def __len__(self) -> int:
+        return len(self.low) + len(self.high)
+
+    def _target(self) -> int:
+        n = len(self.low) + len(self.high)
+        if self.k is not None: return min(self.k, n)
+        return max(1, -(-self.num * n // self.den)) if n else 0
+
+    def _fix(self) -> None:
+        "Move elements between low and high until low holds the K smallest. / O(√N) per moved element"
+        low, high = self.low, self.high
+        k = self._target()
+        while len(low) > k:
+            x = low.pop()
+            self.low_sum -= x
+            high.add(x)
+        while len(low) < k:
+            x = high.pop(0)
+            self.low_sum += x
+            low.add(x)
+
+    def push(self, x: T) -> T | None:
+        "Add x, and evict and return the oldest element if the window was full. / O(√N)"
+        if self.low and x < self.low[-1]:
+            self.low.add(x)
+            self.low_sum += x
+        else: self.high.add(x)
+        ans = None
+        if self.size is not None:
+            self.window.append(x)
+            if len(self.window) > self.size:
+                ans = self.window.popleft()
+                self._evict(ans)
+        self._fix()
+        return ans
+
+    def _evict(self, x: T) -> bool:
+        if self.low and x <= self.low[-1]:
+            if not self.low.discard(x): return False
+            self.low_sum -= x
+            return True
+        return self.high.discard(x)
+
+    def evict(self, x: T) -> bool:
+        "Remove an element == x and return True if removed. Use this only without size. / O(√N)"
+        if not self._evict(x): return False
+        self._fix()
+        return True
+
+    def kth(self) -> T | None:
+        "Return the K-th smallest element, or None if there are fewer than K elements. / O(1)"
+        if not self.low or self.k is not None and len(self.low) < self.k: return None
+        return self.low[-1]
+
+    def kth_sum(self) -> T:
+        "Return the sum of the K smallest elements (of all elements if there are fewer than K). / O(1)"
+        return self.low_sum
+
+
+def run_windows(a: Iterable[T], windows: list[SlidingWindowOrderStats[T]]) -> Iterator[list[tuple[T | None, T]]]:
+    "Push each element of a into every window in one pass, and yield [(w.kth(), w.kth_sum()) for w in windows] after each element."
+    for x in a:
+        for w in windows: w.push(x)
+        yield [(w.kth(), w.low_sum) for w in windows]
@@ -0,0 +1,128 @@
+from typing import Generic, Iterable, Iterator, Mapping, TypeVar
+from SortedSet import SortedSet
+K = TypeVar('K')
+V = TypeVar('V')
+
+class SortedDict(Generic[K, V]):
+    "A mapping whose keys are kept in a SortedSet and values in a dict. Paste SortedSet before this class."
+
+    def __init__(self, a: Mapping[K, V] | Iterable[tuple[K, V]] = ()) -> None:
+        "Make a new SortedDict from a mapping or an iterable of (key, value). / O(N) if sorted / O(N log N)"
+        self.d = dict(a)
+        self.s = SortedSet(self.d)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.s)
+
+    def __reversed__(self) -> Iterator[K]:
+        return reversed(self.s)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SortedDict): return list(self.items()) == list(other.items())
+        return self.d == other
+
+    def __len__(self) -> int:
+        return len(self.d)
+
+    def __repr__(self) -> str:
+        return "SortedDict" + str(list(self.items()))
+
+    def __str__(self) -> str:
+        return "{" + ", ".join(f"{k!r}: {v!r}" for k, v in self.items()) + "}"
+
+    def __contains__(self, k: K) -> bool:
+        "Return True if k is a key. / O(1)"
+        return k in self.d
+
+    def __getitem__(self, k: K) -> V:
+        "Return the value of k, raise KeyError if not found. / O(1)"
+        return self.d[k]
+
+    def get(self, k: K, default: V | None = None) -> V | None:
+        "Return the value of k, or default if not found. / O(1)"
+        return self.d.get(k, default)
+
+    def __setitem__(self, k: K, v: V) -> None:
+        "Set the value of k. / O(1) if k is already a key / O(√N)"
+        if k not in self.d: self.s.add(k)
+        self.d[k] = v
+
+    def __delitem__(self, k: K) -> None:
+        "Remove k, raise KeyError if not found. / O(√N)"
+        del self.d[k]
+        self.s.discard(k)
+
+    def pop(self, k: K, *default: V) -> V:
+        "Remove k and return its value. Return default if given and k is not found, otherwise raise KeyError. / O(√N)"
+        if k not in self.d:
+            if default: return default[0]
+            raise KeyError(k)
+        self.s.discard(k)
+        return self.d.pop(k)
+
+    def setdefault(self, k: K, default: V | None = None) -> V | None:
+        "Return the value of k, setting it to default first if not found. / O(1) if k is already a key / O(√N)"
+        if k not in self.d: self[k] = default
+        return self.d[k]
+
+    def update(self, a: Mapping[K, V] | Iterable[tuple[K, V]] = ()) -> None:
+        "Set the values of all (key, value) in a. / O(K log K + N) / O(K √N) if K is small"
+        a = dict(a)
+        self.s.update(k for k in a if k not in self.d)
+        self.d.update(a)
+
+    def clear(self) -> None:
+        self.d = {}
+        self.s = SortedSet()
+
+    def keys(self, lo: K | None = None, hi: K | None = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[K]:
+        "Iterate over the keys between lo and hi in ascending order (descending if reverse). None means unbounded."
+        return self.s.irange(lo, hi, inclusive, reverse)
+
+    def values(self, lo: K | None = None, hi: K | None = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[V]:
+        "Iterate over the values of the keys between lo and hi in the order of the keys."
+        d = self.d
+        for k in self.s.irange(lo, hi, inclusive, reverse): yield d[k]
+
+    def items(self, lo: K | None = None, hi: K | None = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[tuple[K, V]]:
+        "Iterate over the pairs (key, value) whose keys are between lo and hi in the order of the keys."
+        d = self.d
+        for k in self.s.irange(lo, hi, inclusive, reverse): yield (k, d[k])
+
+    def peekitem(self, i: int = -1) -> tuple[K, V]:
+        "Return the pair (key, value) of the i-th key. / O(log N)"
+        k = self.s[i]
+        return (k, self.d[k])
+
+    def popitem(self, i: int = -1) -> tuple[K, V]:
+        "Remove and return the pair (key, value) of the i-th key. / O(log N + √N)"
+        k = self.s.pop(i)
+        return (k, self.d.pop(k))
+
+    def index(self, k: K) -> int:
+        "Count the number of keys < k."
+        return self.s.index(k)
+
+    def index_right(self, k: K) -> int:
+        "Count the number of keys <= k."
+        return self.s.index_right(k)
+
+    def lt(self, x: K) -> tuple[K, V] | None:
+        "Find the pair (key, value) with the largest key < x, or None if it doesn't exist."
+        k = self.s.lt(x)
+        if k is not None: return (k, self.d[k])
+
+    def le(self, x: K) -> tuple[K, V] | None:
+        "Find the pair (key, value) with the largest key <= x, or None if it doesn't exist."
+        k = self.s.le(x)
+        if k is not None: return (k, self.d[k])
+
+    def gt(self, x: K) -> tuple[K, V] | None:
+        "Find the pair (key, value) with the smallest key > x, or None if it doesn't exist."
+        k = self.s.gt(x)
+        if k is not None: return (k, self.d[k])
+
+    def ge(self, x: K) -> tuple[K, V] | None:
+        "Find the pair (key, value) with the smallest key >= x, or None if it doesn't exist."
+        k = self.s.ge(x)
+        if k is not None: return (k, self.d[k])
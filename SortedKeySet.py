@@ -0,0 +1,274 @@
+import math
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Generic, Iterable, Iterator, TypeVar
+T = TypeVar('T')
+
+class SortedKeySet(Generic[T]):
+    BUCKET_RATIO = 16
+    SPLIT_RATIO = 24
+
+    def __init__(self, a: Iterable[T] = [], key: Callable[[T], Any] = lambda x: x) -> None:
+        "Make a new SortedKeySet ordered by key(x) from iterable. Elements with equal keys keep their insertion order, and only the first of elements that are == is kept. / O(N) if sorted and keys are unique / O(N log N)"
+        self.key = key
+        a = list(a)
+        k = list(map(key, a))
+        n = len(a)
+        if any(k[i] > k[i + 1] for i in range(n - 1)):
+            order = sorted(range(n), key=k.__getitem__)
+            a = [a[i] for i in order]
+            k = [k[i] for i in order]
+        if any(k[i] == k[i + 1] for i in range(n - 1)):
+            a, b = [], a
+            k, c = [], k
+            j = 0
+            for x, y in zip(b, c):
+                if not k or k[-1] != y: j = len(a)
+                elif x in a[j:]: continue
+                a.append(x)
+                k.append(y)
+        self._build(a, k)
+
+    def _build(self, a: list[T], k: list[Any]) -> None:
+        "Rebuild the buckets from a list of elements and the sorted list of their keys. / O(N)"
+        n = self.size = len(a)
+        num_bucket = int(math.ceil(math.sqrt(n / self.BUCKET_RATIO)))
+        self.a = [a[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.k = [k[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.maxes = [k[-1] for k in self.k]
+        self.tree = None
+
+    def __iter__(self) -> Iterator[T]:
+        for i in self.a:
+            for j in i: yield j
+
+    def __reversed__(self) -> Iterator[T]:
+        for i in reversed(self.a):
+            for j in reversed(i): yield j
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return "SortedKeySet" + str(self.a)
+
+    def __str__(self) -> str:
+        s = str(list(self))
+        return "{" + s[1 : len(s) - 1] + "}"
+
+    def _find(self, x: T) -> tuple[int, int] | None:
+        "return the index of the bucket and position of an element == x, or None if it doesn't exist. / O(log N + number of elements with the same key)"
+        k = self.key(x)
+        b = bisect_left(self.maxes, k)
+        while b < len(self.a):
+            kb, ab = self.k[b], self.a[b]
+            i = bisect_left(kb, k)
+            while i < len(kb) and kb[i] == k:
+                if ab[i] == x: return (b, i)
+                i += 1
+            if i < len(kb): return None
+            b += 1
+        return None
+
+    def __contains__(self, x: T) -> bool:
+        return self._find(x) is not None
+
+    def add(self, x: T) -> bool:
+        "Add an element after the elements with the same key and return True if no element == x exists. / O(√N)"
+        k = self.key(x)
+        if self.size == 0:
+            self._build([x], [k])
+            return True
+        if self._find(x) is not None: return False
+        b = bisect_right(self.maxes, k)
+        if b == len(self.a): b -= 1
+        a, kb = self.a[b], self.k[b]
+        i = bisect_right(kb, k)
+        a.insert(i, x)
+        kb.insert(i, k)
+        self.size += 1
+        if i == len(kb) - 1: self.maxes[b] = k
+        if len(a) > len(self.a) * self.SPLIT_RATIO:
+            mid = len(a) >> 1
+            self.a[b:b+1] = [a[:mid], a[mid:]]
+            self.k[b:b+1] = [kb[:mid], kb[mid:]]
+            self.maxes.insert(b, kb[mid - 1])
+            self.tree = None
+        elif self.tree is not None: self._tree_add(b, 1)
+        return True
+
+    def _pop(self, b: int, i: int) -> T:
+        a, kb = self.a[b], self.k[b]
+        ans = a.pop(i)
+        kb.pop(i)
+        self.size -= 1
+        if not a:
+            del self.a[b]
+            del self.k[b]
+            del self.maxes[b]
+            self.tree = None
+            return ans
+        if i == len(kb): self.maxes[b] = kb[-1]
+        if self.tree is not None: self._tree_add(b, -1)
+        return ans
+
+    def _build_tree(self) -> list[int]:
+        "Build a Fenwick tree over the sizes of the buckets. / O(√N)"
+        tree = [0]
+        tree += map(len, self.a)
+        n = len(tree)
+        for i in range(1, n):
+            j = i + (i & -i)
+            if j < n: tree[j] += tree[i]
+        self.tree = tree
+        return tree
+
+    def _tree_add(self, b: int, x: int) -> None:
+        "Add x to the size of the b-th bucket in the Fenwick tree. self.tree must not be None."
+        tree = self.tree
+        b += 1
+        while b < len(tree):
+            tree[b] += x
+            b += b & -b
+
+    def _count_before(self, b: int) -> int:
+        "Count the number of elements in the buckets before the b-th bucket. / O(log N)"
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        ans = 0
+        while b:
+            ans += tree[b]
+            b &= b - 1
+        return ans
+
+    def _locate(self, i: int) -> tuple[int, int]:
+        "return the index of the bucket and position of the i-th element. 0 <= i < size. / O(log N)"
+        a = self.a
+        if i < len(a[0]): return (0, i)
+        j = i - self.size + len(a[-1])
+        if j >= 0: return (len(a) - 1, j)
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        n = len(tree)
+        b = 0
+        k = 1 << (n - 1).bit_length() - 1
+        while k:
+            if b + k < n and tree[b + k] <= i:
+                b += k
+                i -= tree[b]
+            k >>= 1
+        return (b, i)
+
+    def discard(self, x: T) -> bool:
+        "Remove an element == x and return True if removed. / O(√N)"
+        p = self._find(x)
+        if p is None: return False
+        self._pop(*p)
+        return True
+
+    def lt_key(self, k: Any) -> T | None:
+        "Find the last element whose key is < k, or None if it doesn't exist."
+        b = bisect_left(self.maxes, k)
+        if b != len(self.a):
+            i = bisect_left(self.k[b], k)
+            if i: return self.a[b][i - 1]
+        if b: return self.a[b - 1][-1]
+
+    def le_key(self, k: Any) -> T | None:
+        "Find the last element whose key is <= k, or None if it doesn't exist."
+        b = bisect_right(self.maxes, k)
+        if b != len(self.a):
+            i = bisect_right(self.k[b], k)
+            if i: return self.a[b][i - 1]
+        if b: return self.a[b - 1][-1]
+
+    def gt_key(self, k: Any) -> T | None:
+        "Find the first element whose key is > k, or None if it doesn't exist."
+        b = bisect_right(self.maxes, k)
+        if b != len(self.a): return self.a[b][bisect_right(self.k[b], k)]
+
+    def ge_key(self, k: Any) -> T | None:
+        "Find the first element whose key is >= k, or None if it doesn't exist."
+        b = bisect_left(self.maxes, k)
+        if b != len(self.a): return self.a[b][bisect_left(self.k[b], k)]
+
+    def lt(self, x: T) -> T | None:
+        "Find the last element whose key is < key(x), or None if it doesn't exist."
+        return self.lt_key(self.key(x))
+
+    def le(self, x: T) -> T | None:
+        "Find the last element whose key is <= key(x), or None if it doesn't exist."
+        return self.le_key(self.key(x))
+
+    def gt(self, x: T) -> T | None:
+        "Find the first element whose key is > key(x), or None if it doesn't exist."
+        return self.gt_key(self.key(x))
+
+    def ge(self, x: T) -> T | None:
+        "Find the first element whose key is >= key(x), or None if it doesn't exist."
+        return self.ge_key(self.key(x))
+
+    def __getitem__(self, i: int) -> T:
+        "Return the i-th element. / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self.a[b][i]
+
+    def pop(self, i: int = -1) -> T:
+        "Pop and return the i-th element. / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        return self._pop(*self._locate(i))
+
+    def index_key(self, k: Any) -> int:
+        "Count the number of elements whose key is < k."
+        b = bisect_left(self.maxes, k)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + bisect_left(self.k[b], k)
+
+    def index_right_key(self, k: Any) -> int:
+        "Count the number of elements whose key is <= k."
+        b = bisect_right(self.maxes, k)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + bisect_right(self.k[b], k)
+
+    def index(self, x: T) -> int:
+        "Count the number of elements whose key is < key(x)."
+        return self.index_key(self.key(x))
+
+    def index_right(self, x: T) -> int:
+        "Count the number of elements whose key is <= key(x)."
+        return self.index_right_key(self.key(x))
+
+    def irange_key(self, lo: Any = None, hi: Any = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements whose keys are between lo and hi in ascending order (descending if reverse). None means unbounded. / O(log N) + O(1) per element"
+        if self.size == 0: return
+        if lo is None: b, i = 0, 0
+        else:
+            f = bisect_left if inclusive[0] else bisect_right
+            b = f(self.maxes, lo)
+            if b == len(self.a): return
+            i = f(self.k[b], lo)
+        c = len(self.a)
+        if hi is not None:
+            f = bisect_right if inclusive[1] else bisect_left
+            c = f(self.maxes, hi)
+            if c != len(self.a): j = f(self.k[c], hi)
+        if c == len(self.a):
+            c -= 1
+            j = len(self.a[c])
+        if not reverse:
+            while b < c:
+                yield from self.a[b][i:]
+                b += 1
+                i = 0
+            if b == c: yield from self.a[b][i:j]
+        else:
+            while b < c:
+                yield from reversed(self.a[c][:j])
+                c -= 1
+                j = len(self.a[c])
+            if b == c: yield from reversed(self.a[b][i:j])
@@ -1,27 +1,72 @@
 # https://github.com/tatyam-prime/SortedSet/blob/main/SortedSet.py
 import math
+import struct
+import sys
+from array import array
 from bisect import bisect_left, bisect_right
-from typing import Generic, Iterable, Iterator, TypeVar
+from functools import reduce
+from itertools import accumulate, groupby, islice
+from operator import lt
+from typing import Any, Callable, Generic, Iterable, Iterator, TypeVar
 T = TypeVar('T')
 
 class SortedSet(Generic[T]):
     BUCKET_RATIO = 16
     SPLIT_RATIO = 24
+    MERGE_RATIO = 4
+    counters = None
+    monoid = None
+    observer = None
+    HEADER = struct.Struct('<4sBc2xQ')  # magic, buckets are array.array, typecode, number of elements
     
-    def __init__(self, a: Iterable[T] = []) -> None:
-        "Make a new SortedSet from iterable. / O(N) if sorted and unique / O(N log N)"
+    def __init__(self, a: Iterable[T] = [], typecode: str | None = None, bucket_ratio: int | None = None, split_ratio: int | None = None) -> None:
+        "Make a new SortedSet from iterable. If typecode is given, the buckets are array.array of that typecode. bucket_ratio and split_ratio override BUCKET_RATIO and SPLIT_RATIO for this instance. / O(N) if sorted and unique / O(N log N)"
+        self.typecode = typecode
+        if bucket_ratio is not None: self.BUCKET_RATIO = bucket_ratio
+        if split_ratio is not None: self.SPLIT_RATIO = split_ratio
         a = list(a)
-        n = len(a)
-        if any(a[i] > a[i + 1] for i in range(n - 1)):
+        if not all(map(lt, a, islice(a, 1, None))):
             a.sort()
-        if any(a[i] >= a[i + 1] for i in range(n - 1)):
-            a, b = [], a
-            for x in b:
-                if not a or a[-1] != x:
-                    a.append(x)
-        n = self.size = len(a)
+            a = [x for x, _ in groupby(a)]
+        self._build(a)
+
+    @classmethod
+    def from_sorted(cls, a: Iterable[T], typecode: str | None = None, bucket_ratio: int | None = None, split_ratio: int | None = None) -> 'SortedSet[T]':
+        "Make a new SortedSet from a sorted iterable, removing duplicates without checking the order. / O(N)"
+        ans = cls(typecode=typecode, bucket_ratio=bucket_ratio, split_ratio=split_ratio)
+        ans._build([x for x, _ in groupby(a)])
+        return ans
+
+    @classmethod
+    def from_sorted_unique(cls, a: Iterable[T], typecode: str | None = None, bucket_ratio: int | None = None, split_ratio: int | None = None) -> 'SortedSet[T]':
+        "Make a new SortedSet from a sorted iterable without duplicates, without checking anything. / O(N)"
+        ans = cls(typecode=typecode, bucket_ratio=bucket_ratio, split_ratio=split_ratio)
+        ans._build(list(a))
+        return ans
+
+    def _build(self, a: list[T]) -> None:
+        "Rebuild the buckets from a sorted list without duplicates. a is emptied. / O(N)"
+        if self.typecode is not None and getattr(a, 'typecode', None) != self.typecode: a = array(self.typecode, a)
+        n = self.size = self.built_size = len(a)
         num_bucket = int(math.ceil(math.sqrt(n / self.BUCKET_RATIO)))
-        self.a = [a[n * i // num_bucket : n * (i + 1) // num_bucket] for i in range(num_bucket)]
+        self.a = []
+        for i in range(num_bucket - 1, -1, -1):
+            j = n * i // num_bucket
+            self.a.append(a[j:])
+            del a[j:]  # cut from the tail so that a and the buckets never both hold all the data
+        self.a.reverse()
+        self.maxes = [a[-1] for a in self.a]
+        self.tree = None
+        self.sums = None
+        self.shared = set()
+
+    def _own(self, b: int) -> list[T]:
+        "Copy the b-th bucket if it may be shared with a copy, and return it. / O(bucket size)"
+        a = self.a[b]
+        if id(a) in self.shared:
+            self.shared.discard(id(a))
+            a = self.a[b] = a[:]
+        return a
 
     def __iter__(self) -> Iterator[T]:
         for i in self.a:
@@ -44,10 +89,67 @@ class SortedSet(Generic[T]):
         s = str(list(self))
         return "{" + s[1 : len(s) - 1] + "}"
 
+    def __getstate__(self) -> dict:
+        "Pickle the buckets as they are. maxes and tree are recomputed on load, and enable_stats() is not kept."
+        state = {k: v for k, v in self.__dict__.items() if not callable(v)}
+        del state['maxes']
+        state['tree'] = None
+        state['sums'] = None
+        state['shared'] = set()
+        state.pop('counters', None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        "Restore the buckets without checking the order. A state of the older format, holding only a and size, is accepted. / O(√N)"
+        self.__dict__.update(typecode=None, tree=None, sums=None, shared=set(), built_size=state['size'])
+        self.__dict__.update(state)
+        self.maxes = [a[-1] for a in self.a]
+
+    def copy(self) -> 'SortedSet[T]':
+        "Return a copy that shares the buckets with self. A shared bucket is copied when either side first modifies it. / O(√N)"
+        ans = type(self).__new__(type(self))
+        ans.__dict__.update(self.__getstate__())
+        ans.a = self.a[:]
+        ans.maxes = self.maxes[:]
+        if self.tree is not None: ans.tree = self.tree[:]
+        if self.sums is not None: ans.sums = self.sums[:]
+        ans.shared = set(map(id, self.a))
+        self.shared = set(ans.shared)
+        return ans
+
+    def snapshot(self) -> 'SortedSet[T]':
+        "Same as copy(). Take one for consistent reads while self keeps changing. / O(√N)"
+        return self.copy()
+
+    def dump(self, fp, typecode: str = 'q') -> None:
+        "Write the elements to a binary file as a flat little-endian array.array. typecode is used only if self.typecode is None. / O(N)"
+        tc = self.typecode or typecode
+        b = array(tc)
+        if self.typecode is not None:
+            for a in self.a: b += a
+        else: b.extend(self)
+        if sys.byteorder == 'big': b.byteswap()
+        fp.write(self.HEADER.pack(b'SSet', self.typecode is not None, tc.encode(), len(b)))
+        b.tofile(fp)
+
+    @classmethod
+    def load(cls, fp) -> 'SortedSet':
+        "Read a SortedSet written by dump() without checking the order. The buckets are array.array if the dumped one had a typecode. / O(N)"
+        magic, typed, tc, n = cls.HEADER.unpack(fp.read(cls.HEADER.size))
+        if magic != b'SSet': raise ValueError('not a SortedSet file')
+        tc = tc.decode()
+        b = array(tc)
+        b.fromfile(fp, n)
+        if sys.byteorder == 'big': b.byteswap()
+        ans = cls(typecode=tc if typed else None)
+        ans._build(b if typed else b.tolist())
+        return ans
+
     def _position(self, x: T) -> tuple[list[T], int, int]:
         "return the bucket, index of the bucket and position in which x should be. self must not be empty."
-        for i, a in enumerate(self.a):
-            if x <= a[-1]: break
+        i = bisect_left(self.maxes, x)
+        if i == len(self.a): i -= 1
+        a = self.a[i]
         return (a, i, bisect_left(a, x))
 
     def __contains__(self, x: T) -> bool:
@@ -58,24 +160,155 @@ class SortedSet(Generic[T]):
     def add(self, x: T) -> bool:
         "Add an element and return True if added. / O(√N)"
         if self.size == 0:
-            self.a = [[x]]
-            self.size = 1
+            self._build([x])
+            if self.observer is not None: self.observer(None, x, None, True)
             return True
         a, b, i = self._position(x)
         if i != len(a) and a[i] == x: return False
+        self._insert(a, b, i, x)
+        return True
+
+    def _insert(self, a: list[T], b: int, i: int, x: T) -> None:
+        "Insert x at the i-th position of the b-th bucket a."
+        if self.observer is not None: p, n = self._around(a, b, i, i)
+        if self.shared: a = self._own(b)
         a.insert(i, x)
         self.size += 1
+        if i == len(a) - 1: self.maxes[b] = x
         if len(a) > len(self.a) * self.SPLIT_RATIO:
             mid = len(a) >> 1
             self.a[b:b+1] = [a[:mid], a[mid:]]
-        return True
+            self.maxes.insert(b, a[mid - 1])
+            self.tree = None
+            if self.sums is not None: self.sums[b:b+1] = map(self._fold, self.a[b:b+2])
+        else:
+            if self.tree is not None: self._tree_add(b, 1)
+            if self.sums is not None: self._update_sums(b, x, True)
+        if self.size > self.built_size << 1: self.rebalance()
+        if self.observer is not None: self.observer(p, x, n, True)
+
+    def update(self, a: Iterable[T]) -> None:
+        "Add all elements of iterable. / O(K log K + N) / O(K √N) if K is small"
+        a = sorted(a)
+        if not a: return
+        if len(a) * self.BUCKET_RATIO < self.size or self.observer is not None:
+            for x in a: self.add(x)
+            return
+        if self.typecode is not None: return self._update_typed(a)
+        b = []
+        for c in self.a: b += c
+        b += a
+        b.sort()  # merges the two sorted runs in linear time
+        a = []
+        for x in b:
+            if not a or a[-1] != x:
+                a.append(x)
+        self._build(a)
+
+    def _update_typed(self, a: list[T]) -> None:
+        "update() for array buckets: merge a sorted list into the buckets one bucket at a time, so that only one bucket is boxed at a time. / O(K + N)"
+        b = array(self.typecode)
+        j = 0
+        for c, m in zip(self.a, self.maxes):
+            k = bisect_right(a, m, j)
+            if j == k: b += c
+            else:
+                x = c.tolist()
+                x += a[j:k]
+                x.sort()  # merges the two sorted runs in linear time
+                b += array(self.typecode, [y for y, _ in groupby(x)])
+                j = k
+        b += array(self.typecode, [y for y, _ in groupby(a[j:])])
+        self._build(b)
     
     def _pop(self, a: list[T], b: int, i: int) -> T:
+        if self.shared: a = self._own(b)
+        if self.observer is not None: p, n = self._around(a, b, i, i + 1)
         ans = a.pop(i)
         self.size -= 1
-        if not a: del self.a[b]
+        if not a:
+            del self.a[b]
+            del self.maxes[b]
+            self.tree = None
+            if self.sums is not None: del self.sums[b]
+        else:
+            if i == len(a): self.maxes[b] = a[-1]
+            if self.sums is not None: self._update_sums(b, ans, False)
+            if len(a) < len(self.a) * self.MERGE_RATIO and len(self.a) > 1: self._merge_bucket(b)
+            elif self.tree is not None: self._tree_add(b, -1)
+        if self.size << 1 < self.built_size: self.rebalance()
+        if self.observer is not None: self.observer(p, ans, n, False)
+        return ans
+
+    def rebalance(self) -> None:
+        "Rebuild the buckets for the current number of elements. / O(N)"
+        a = [] if self.typecode is None else array(self.typecode)
+        for c in self.a: a += c
+        self._build(a)
+
+    def _merge_bucket(self, b: int) -> None:
+        "Merge the b-th bucket with its smaller neighbour, and split the result in half if it is too large. len(self.a) >= 2."
+        if b == 0 or b + 1 < len(self.a) and len(self.a[b + 1]) < len(self.a[b - 1]): c = b
+        else: c = b - 1
+        a = self.a[c] + self.a[c + 1]
+        if len(a) > (len(self.a) - 1) * self.SPLIT_RATIO:
+            mid = len(a) >> 1
+            self.a[c:c+2] = [a[:mid], a[mid:]]
+            self.maxes[c] = a[mid - 1]
+            if self.sums is not None: self.sums[c:c+2] = map(self._fold, self.a[c:c+2])
+        else:
+            self.a[c:c+2] = [a]
+            del self.maxes[c]
+            if self.sums is not None: self.sums[c:c+2] = [self._fold(a)]
+        self.tree = None
+
+    def _build_tree(self) -> list[int]:
+        "Build a Fenwick tree over the sizes of the buckets. / O(√N)"
+        tree = [0]
+        tree += map(len, self.a)
+        n = len(tree)
+        for i in range(1, n):
+            j = i + (i & -i)
+            if j < n: tree[j] += tree[i]
+        self.tree = tree
+        return tree
+
+    def _tree_add(self, b: int, x: int) -> None:
+        "Add x to the size of the b-th bucket in the Fenwick tree. self.tree must not be None."
+        tree = self.tree
+        b += 1
+        while b < len(tree):
+            tree[b] += x
+            b += b & -b
+
+    def _count_before(self, b: int) -> int:
+        "Count the number of elements in the buckets before the b-th bucket. / O(log N)"
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        ans = 0
+        while b:
+            ans += tree[b]
+            b &= b - 1
         return ans
 
+    def _locate(self, i: int) -> tuple[int, int]:
+        "return the index of the bucket and position of the i-th element. 0 <= i < size. / O(log N)"
+        a = self.a
+        if i < len(a[0]): return (0, i)
+        j = i - self.size + len(a[-1])
+        if j >= 0: return (len(a) - 1, j)
+        tree = self.tree
+        if tree is None: tree = self._build_tree()
+        n = len(tree)
+        b = 0
+        k = 1 << (n - 1).bit_length() - 1
+        while k:
+            if b + k < n and tree[b + k] <= i:
+                b += k
+                i -= tree[b]
+            k >>= 1
+        return (b, i)
+
     def discard(self, x: T) -> bool:
         "Remove an element and return True if removed. / O(√N)"
         if self.size == 0: return False
@@ -86,66 +319,559 @@ class SortedSet(Generic[T]):
     
     def lt(self, x: T) -> T | None:
         "Find the largest element < x, or None if it doesn't exist."
-        for a in reversed(self.a):
-            if a[0] < x:
-                return a[bisect_left(a, x) - 1]
+        b = bisect_left(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            i = bisect_left(a, x)
+            if i: return a[i - 1]
+        if b: return self.maxes[b - 1]
+
+    def _around(self, a: list[T], b: int, i: int, j: int) -> tuple[T | None, T | None]:
+        "return the element before the i-th position and the element at the j-th position of the b-th bucket a, looking into the neighbouring buckets."
+        if i: p = a[i - 1]
+        elif b: p = self.a[b - 1][-1]
+        else: p = None
+        if j < len(a): n = a[j]
+        elif b + 1 < len(self.a): n = self.a[b + 1][0]
+        else: n = None
+        return (p, n)
+
+    def neighbors(self, x: T) -> tuple[T | None, T | None, int]:
+        "Return (prev, next, rank): the elements just before and after x (after the first x if x is in s) and s.index(x). / O(log N)"
+        if self.size == 0: return (None, None, 0)
+        a, b, i = self._position(x)
+        p, n = self._around(a, b, i, i + (i != len(a) and a[i] == x))
+        return (p, n, self._count_before(b) + i)
+
+    def add_with_neighbors(self, x: T) -> tuple[T | None, T | None, int] | None:
+        "Add an element and return (prev, next, rank) of it, or None if it was already in s. / O(√N)"
+        if self.size == 0:
+            self.add(x)
+            return (None, None, 0)
+        a, b, i = self._position(x)
+        if i != len(a) and a[i] == x: return None
+        ans = (*self._around(a, b, i, i), self._count_before(b) + i)
+        self._insert(a, b, i, x)
+        return ans
+
+    def discard_with_neighbors(self, x: T) -> tuple[T | None, T | None, int] | None:
+        "Remove an element and return (prev, next, rank) of it, or None if it was not in s. / O(√N)"
+        if self.size == 0: return None
+        a, b, i = self._position(x)
+        if i == len(a) or a[i] != x: return None
+        ans = (*self._around(a, b, i, i + 1), self._count_before(b) + i)
+        self._pop(a, b, i)
+        return ans
 
     def le(self, x: T) -> T | None:
         "Find the largest element <= x, or None if it doesn't exist."
-        for a in reversed(self.a):
-            if a[0] <= x:
-                return a[bisect_right(a, x) - 1]
+        b = bisect_right(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            i = bisect_right(a, x)
+            if i: return a[i - 1]
+        if b: return self.maxes[b - 1]
 
     def gt(self, x: T) -> T | None:
         "Find the smallest element > x, or None if it doesn't exist."
-        for a in self.a:
-            if a[-1] > x:
-                return a[bisect_right(a, x)]
+        b = bisect_right(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            return a[bisect_right(a, x)]
 
     def ge(self, x: T) -> T | None:
         "Find the smallest element >= x, or None if it doesn't exist."
-        for a in self.a:
-            if a[-1] >= x:
-                return a[bisect_left(a, x)]
+        b = bisect_left(self.maxes, x)
+        if b != len(self.a):
+            a = self.a[b]
+            return a[bisect_left(a, x)]
     
     def __getitem__(self, i: int) -> T:
-        "Return the i-th element."
-        if i < 0:
-            for a in reversed(self.a):
-                i += len(a)
-                if i >= 0: return a[i]
-        else:
-            for a in self.a:
-                if i < len(a): return a[i]
-                i -= len(a)
-        raise IndexError
+        "Return the i-th element. / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self.a[b][i]
     
     def pop(self, i: int = -1) -> T:
-        "Pop and return the i-th element."
-        if i < 0:
-            for b, a in enumerate(reversed(self.a)):
-                i += len(a)
-                if i >= 0: return self._pop(a, ~b, i)
-        else:
-            for b, a in enumerate(self.a):
-                if i < len(a): return self._pop(a, b, i)
-                i -= len(a)
-        raise IndexError
-    
+        "Pop and return the i-th element. / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i >= self.size: raise IndexError
+        b, i = self._locate(i)
+        return self._pop(self.a[b], b, i)
+
     def index(self, x: T) -> int:
         "Count the number of elements < x."
-        ans = 0
-        for a in self.a:
-            if a[-1] >= x:
-                return ans + bisect_left(a, x)
-            ans += len(a)
-        return ans
+        b = bisect_left(self.maxes, x)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + bisect_left(self.a[b], x)
 
     def index_right(self, x: T) -> int:
         "Count the number of elements <= x."
-        ans = 0
+        b = bisect_right(self.maxes, x)
+        if b == len(self.a): return self.size
+        return self._count_before(b) + bisect_right(self.a[b], x)
+
+    def _position_many(self, q: list[T], right: bool) -> tuple[list[int], list[int]]:
+        "For each x in q, return the index b of the first bucket whose maximum is >= x (> x if right), or len(self.a) if none, and the position i of bisect_left (bisect_right if right) in it. q must be a list or a NumPy array. / O(K log K + K log N)"
+        n = len(self.a)
+        np = sys.modules.get('numpy')
+        if np is not None and isinstance(q, np.ndarray):
+            side = 'right' if right else 'left'
+            B = np.searchsorted(np.asarray(self.maxes), q, side) if n else np.zeros(len(q), np.intp)
+            I = np.zeros(len(q), np.intp)
+            order = np.argsort(B, kind='stable')
+            cut = np.searchsorted(B[order], np.arange(n + 1))
+            for b in np.flatnonzero(cut[1:] > cut[:-1]):
+                k = order[cut[b]:cut[b + 1]]
+                I[k] = np.searchsorted(np.asarray(self.a[b]), q[k], side)
+            return B, I
+        f = bisect_right if right else bisect_left
+        B = [n] * len(q)
+        I = [0] * len(q)
+        b = 0
+        for k in sorted(range(len(q)), key=q.__getitem__):
+            x = q[k]
+            b = f(self.maxes, x, b)
+            if b == n: break
+            B[k] = b
+            I[k] = f(self.a[b], x)
+        return B, I
+
+    def _queries(self, q: Iterable[T]) -> list[T]:
+        np = sys.modules.get('numpy')
+        if np is not None and isinstance(q, np.ndarray): return q
+        return list(q)
+
+    def _index_many(self, q: Iterable[T], right: bool) -> list[int]:
+        B, I = self._position_many(self._queries(q), right)
+        p = list(accumulate(map(len, self.a), initial=0))
+        if type(B) is list: return [p[b] + i for b, i in zip(B, I)]
+        return sys.modules['numpy'].asarray(p)[B] + I
+
+    def index_many(self, q: Iterable[T]) -> list[int]:
+        "Return [s.index(x) for x in q] in one sweep over the buckets. Return a NumPy array if q is a NumPy array. / O(K log K + K log N)"
+        return self._index_many(q, False)
+
+    def index_right_many(self, q: Iterable[T]) -> list[int]:
+        "Return [s.index_right(x) for x in q] in one sweep over the buckets. Return a NumPy array if q is a NumPy array. / O(K log K + K log N)"
+        return self._index_many(q, True)
+
+    def contains_many(self, q: Iterable[T]) -> list[bool]:
+        "Return [x in s for x in q] in one sweep over the buckets. Return a NumPy array if q is a NumPy array. / O(K log K + K log N)"
+        q = self._queries(q)
+        if type(q) is not list: return self._index_many(q, True) > self._index_many(q, False)
+        B, I = self._position_many(q, False)
+        a, n = self.a, len(self.a)
+        return [b != n and a[b][i] == x for x, b, i in zip(q, B, I)]
+
+    def lt_many(self, q: Iterable[T]) -> list[T | None]:
+        "Return [s.lt(x) for x in q] in one sweep over the buckets. / O(K log K + K log N)"
+        B, I = self._position_many(self._queries(q), False)
+        a, maxes = self.a, self.maxes
+        return [a[b][i - 1] if i else maxes[b - 1] if b else None for b, i in zip(B, I)]
+
+    def le_many(self, q: Iterable[T]) -> list[T | None]:
+        "Return [s.le(x) for x in q] in one sweep over the buckets. / O(K log K + K log N)"
+        B, I = self._position_many(self._queries(q), True)
+        a, maxes = self.a, self.maxes
+        return [a[b][i - 1] if i else maxes[b - 1] if b else None for b, i in zip(B, I)]
+
+    def gt_many(self, q: Iterable[T]) -> list[T | None]:
+        "Return [s.gt(x) for x in q] in one sweep over the buckets. / O(K log K + K log N)"
+        B, I = self._position_many(self._queries(q), True)
+        a, n = self.a, len(self.a)
+        return [a[b][i] if b != n else None for b, i in zip(B, I)]
+
+    def ge_many(self, q: Iterable[T]) -> list[T | None]:
+        "Return [s.ge(x) for x in q] in one sweep over the buckets. / O(K log K + K log N)"
+        B, I = self._position_many(self._queries(q), False)
+        a, n = self.a, len(self.a)
+        return [a[b][i] if b != n else None for b, i in zip(B, I)]
+
+    def set_monoid(self, op: Callable[[Any, Any], Any], e: Any) -> None:
+        "Aggregate with the monoid (op, e) instead of + in prefix_sum / sum_below / range_sum. op must be associative, and e is its identity."
+        self.monoid = (op, e)
+        self.sums = None
+
+    def _fold(self, a: Iterable[T], x: Any = None) -> Any:
+        "Aggregate x (the identity if None) and the elements of a from left to right."
+        if self.monoid is None: return sum(a) if x is None else sum(a, x)
+        op, e = self.monoid
+        return reduce(op, a, e if x is None else x)
+
+    def _build_sums(self) -> list[Any]:
+        "Aggregate each bucket. / O(N)"
+        self.sums = list(map(self._fold, self.a))
+        return self.sums
+
+    def _update_sums(self, b: int, x: T, add: bool) -> None:
+        "Update the aggregate of the b-th bucket after adding (removing if not add) x. self.sums must not be None."
+        if self.monoid is None: self.sums[b] += x if add else -x
+        else: self.sums[b] = self._fold(self.a[b])
+
+    def _sum_between(self, b: int, i: int, c: int, j: int) -> Any:
+        "Aggregate from the i-th element of the b-th bucket to just before the j-th element of the c-th bucket. b <= c < len(self.a)."
+        if b == c: return self._fold(islice(self.a[b], i, j))
+        sums = self.sums
+        if sums is None: sums = self._build_sums()
+        x = self._fold(islice(self.a[b], i, None))
+        x = self._fold(islice(sums, b + 1, c), x)
+        return self._fold(islice(self.a[c], j), x)
+
+    def _bound(self, x: T, right: bool) -> tuple[int, int]:
+        "return the index of the bucket and position of bisect_left (bisect_right if right) of x. self must not be empty."
+        f = bisect_right if right else bisect_left
+        b = f(self.maxes, x)
+        if b == len(self.a): return (b - 1, len(self.a[b - 1]))
+        return (b, f(self.a[b], x))
+
+    def prefix_sum(self, k: int) -> Any:
+        "Return the sum of the k smallest elements. The sums of the buckets are kept once this is called. / O(√N)"
+        if k <= 0 or self.size == 0: return self._fold(())
+        if k >= self.size: return self._sum_between(0, 0, len(self.a) - 1, len(self.a[-1]))
+        return self._sum_between(0, 0, *self._locate(k))
+
+    def sum_below(self, x: T) -> Any:
+        "Return the sum of the elements < x. / O(√N)"
+        if self.size == 0: return self._fold(())
+        return self._sum_between(0, 0, *self._bound(x, False))
+
+    def range_sum(self, lo: T | None = None, hi: T | None = None, inclusive: tuple[bool, bool] = (True, True)) -> Any:
+        "Return the sum of the elements between lo and hi. None means unbounded. / O(√N)"
+        if self.size == 0: return self._fold(())
+        b, i = (0, 0) if lo is None else self._bound(lo, not inclusive[0])
+        c, j = (len(self.a) - 1, len(self.a[-1])) if hi is None else self._bound(hi, inclusive[1])
+        if (b, i) >= (c, j): return self._fold(())
+        return self._sum_between(b, i, c, j)
+
+    def _delete(self, start: int, stop: int) -> int:
+        "Remove the elements in s[start:stop] and return the number of removed elements. 0 <= start, stop <= size. / O(√N + K)"
+        if start >= stop: return 0
+        if self.observer is not None:
+            for _ in range(start, stop): self.pop(start)
+            return stop - start
+        b, i = self._locate(start)
+        c, j = self._locate(stop - 1)
+        if self.shared:
+            self._own(b)
+            self._own(c)
+        a = self.a
+        n = len(a)
+        if b == c: del a[b][i:j + 1]
+        else:
+            del a[c][:j + 1]
+            del a[b][i:]
+            del a[b + 1:c]
+            del self.maxes[b + 1:c]
+            if not a[b + 1]:
+                del a[b + 1]
+                del self.maxes[b + 1]
+        if a[b]: self.maxes[b] = a[b][-1]
+        else:
+            del a[b]
+            del self.maxes[b]
+        if self.sums is not None: self.sums[b:c+1] = map(self._fold, a[b : len(a) - n + c + 1])
+        self.size -= stop - start
+        self.tree = None
+        for k in (b + 1, b):
+            if k < len(a) and len(a[k]) < len(a) * self.MERGE_RATIO and len(a) > 1: self._merge_bucket(k)
+        if self.size << 1 < self.built_size: self.rebalance()
+        return stop - start
+
+    def __delitem__(self, i: int | slice) -> None:
+        "Remove the i-th element, or the elements in the slice i. / O(√N + K) if i is a slice with step 1"
+        if not isinstance(i, slice):
+            self.pop(i)
+            return
+        start, stop, step = i.indices(self.size)
+        if step == 1: self._delete(start, stop)
+        else:
+            for k in sorted(range(start, stop, step), reverse=True): self.pop(k)
+
+    def discard_range(self, lo: T | None = None, hi: T | None = None, inclusive: tuple[bool, bool] = (True, True)) -> int:
+        "Remove all elements between lo and hi and return the number of removed elements. None means unbounded. / O(√N + K)"
+        i = 0 if lo is None else self.index(lo) if inclusive[0] else self.index_right(lo)
+        j = self.size if hi is None else self.index_right(hi) if inclusive[1] else self.index(hi)
+        return self._delete(i, j)
+
+    class Cursor:
+        "A position in a SortedSet: at an element, or at the end (value is None). If the SortedSet is modified, the cursor continues from its value."
+
+        def __init__(self, s: 'SortedSet[T]', b: int, i: int) -> None:
+            self.s = s
+            self._set(b, i)
+
+        def _set(self, b: int, i: int) -> None:
+            self.b = b
+            self.i = i
+            self.value = self.s.a[b][i] if b < len(self.s.a) else None
+
+        def _search(self, right: bool) -> tuple[int, int]:
+            "Return the position of the first element >= value (> value if right) without moving. value must not be None. / O(log N)"
+            a = self.s.a
+            f = bisect_right if right else bisect_left
+            b = f(self.s.maxes, self.value)
+            return b, f(a[b], self.value) if b < len(a) else 0
+
+        def valid(self) -> bool:
+            "Return True if the cursor still points at its value, so that it can step in O(1). / O(1)"
+            a, b = self.s.a, self.b
+            if self.value is None: return b == len(a) and self.i == 0
+            return b < len(a) and self.i < len(a[b]) and a[b][self.i] == self.value
+
+        def next(self) -> T | None:
+            "Move to the next element and return it, or move to the end and return None if there is none. If the SortedSet was modified, the next element is the first one > value. / O(1) amortized"
+            a = self.s.a
+            if self.value is None: self._set(len(a), 0)
+            elif not self.valid(): self._set(*self._search(True))
+            elif self.i + 1 < len(a[self.b]): self._set(self.b, self.i + 1)
+            else: self._set(self.b + 1, 0)
+            return self.value
+
+        def prev(self) -> T | None:
+            "Move to the previous element and return it, or return None without moving if there is none. If the SortedSet was modified, the previous element is the last one < value. / O(1) amortized"
+            a = self.s.a
+            if self.value is None: b, i = len(a), 0
+            elif self.valid(): b, i = self.b, self.i
+            else: b, i = self._search(False)
+            if i: self._set(b, i - 1)
+            elif b: self._set(b - 1, len(a[b - 1]) - 1)
+            else: return None
+            return self.value
+
+        @property
+        def rank(self) -> int:
+            "The number of elements < value (len(s) at the end). Reading it doesn't move the cursor. / O(log N)"
+            if self.value is None: return self.s.size
+            b, i = (self.b, self.i) if self.valid() else self._search(False)
+            if b == len(self.s.a): return self.s.size
+            return self.s._count_before(b) + i
+
+        def delete(self) -> T:
+            "Remove the element at the cursor, move to the next element and return the removed one. Raise KeyError without moving if value is no longer in the SortedSet. / O(√N)"
+            x = self.value
+            if x is None: raise KeyError
+            s = self.s
+            b, i = (self.b, self.i) if self.valid() else self._search(False)
+            if b == len(s.a) or s.a[b][i] != x: raise KeyError(x)
+            r = s._count_before(b) + i
+            s._pop(s.a[b], b, i)
+            if r < s.size: self._set(*s._locate(r))
+            else: self._set(len(s.a), 0)
+            return x
+
+    def find(self, x: T) -> 'Cursor':
+        "Return a cursor at the first element >= x, or at the end if it doesn't exist. / O(log N)"
+        b = bisect_left(self.maxes, x)
+        return self.Cursor(self, b, bisect_left(self.a[b], x) if b < len(self.a) else 0)
+
+    def cursor_at(self, i: int) -> 'Cursor':
+        "Return a cursor at the i-th element, or at the end if i == len(s). / O(log N)"
+        if i < 0: i += self.size
+        if i < 0 or i > self.size: raise IndexError
+        if i == self.size: return self.Cursor(self, len(self.a), 0)
+        return self.Cursor(self, *self._locate(i))
+
+    def _walk(self, b: int, i: int, c: int, j: int, reverse: bool) -> Iterator[T]:
+        "Iterate from the i-th element of the b-th bucket to just before the j-th element of the c-th bucket."
+        if not reverse:
+            while b < c:
+                yield from self.a[b][i:]
+                b += 1
+                i = 0
+            if b == c: yield from self.a[b][i:j]
+        else:
+            while b < c:
+                yield from reversed(self.a[c][:j])
+                c -= 1
+                j = len(self.a[c])
+            if b == c: yield from reversed(self.a[b][i:j])
+
+    def islice(self, start: int | None = None, stop: int | None = None, reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements in s[start:stop] (in reverse order if reverse). / O(log N) + O(1) per element"
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop: return
+        b, i = self._locate(start)
+        c, j = self._locate(stop - 1)
+        yield from self._walk(b, i, c, j + 1, reverse)
+
+    def irange(self, lo: T | None = None, hi: T | None = None, inclusive: tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[T]:
+        "Iterate over the elements between lo and hi in ascending order (descending if reverse). None means unbounded. / O(log N) + O(1) per element"
+        if self.size == 0: return
+        if lo is None: b, i = 0, 0
+        else:
+            f = bisect_left if inclusive[0] else bisect_right
+            b = f(self.maxes, lo)
+            if b == len(self.a): return
+            i = f(self.a[b], lo)
+        c = len(self.a)
+        if hi is not None:
+            f = bisect_right if inclusive[1] else bisect_left
+            c = f(self.maxes, hi)
+            if c != len(self.a): j = f(self.a[c], hi)
+        if c == len(self.a):
+            c -= 1
+            j = len(self.a[c])
+        yield from self._walk(b, i, c, j, reverse)
+
+    def _merge_sorted(self, other: 'SortedSet[T]', left: bool, both: bool, right: bool) -> list[T]:
+        "Merge two sorted sets and return the sorted list of the elements only in self (if left), in both (if both) and only in other (if right). / O(N + M)"
+        a, b = [], []
+        for c in self.a: a += c
+        for c in other.a: b += c
+        n, m = len(a), len(b)
+        ans = []
+        i = j = 0
+        while i < n and j < m:
+            x, y = a[i], b[j]
+            if x < y:
+                if left: ans.append(x)
+                i += 1
+            elif y < x:
+                if right: ans.append(y)
+                j += 1
+            else:
+                if both: ans.append(x)
+                i += 1
+                j += 1
+        if left: ans += a[i:]
+        if right: ans += b[j:]
+        return ans
+
+    def _assign_merged(self, other: 'SortedSet[T]', left: bool, both: bool, right: bool) -> None:
+        "Replace the contents of self with self._merge_sorted(other, left, both, right). With an observer, add and discard the difference one element at a time. / O(N + M) / O(N + M + K √N) with an observer"
+        if self.observer is None: return self._build(self._merge_sorted(other, left, both, right))
+        for x in self._merge_sorted(other, not left, not both, False): self.discard(x)
+        if right:
+            for x in self._merge_sorted(other, False, False, True): self.add(x)
+
+    def _from_sorted(self, a: list[T]) -> 'SortedSet[T]':
+        ans = type(self)(typecode=self.typecode, bucket_ratio=self.BUCKET_RATIO, split_ratio=self.SPLIT_RATIO)
+        ans.MERGE_RATIO = self.MERGE_RATIO
+        ans._build(a)
+        return ans
+
+    def __or__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        "Return the union. / O(N + M)"
+        if not isinstance(other, SortedSet): return NotImplemented
+        return self._from_sorted(self._merge_sorted(other, True, True, True))
+
+    def __and__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        "Return the intersection. / O(N + M)"
+        if not isinstance(other, SortedSet): return NotImplemented
+        return self._from_sorted(self._merge_sorted(other, False, True, False))
+
+    def __sub__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        "Return the difference. / O(N + M)"
+        if not isinstance(other, SortedSet): return NotImplemented
+        return self._from_sorted(self._merge_sorted(other, True, False, False))
+
+    def __xor__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        "Return the symmetric difference. / O(N + M)"
+        if not isinstance(other, SortedSet): return NotImplemented
+        return self._from_sorted(self._merge_sorted(other, True, False, True))
+
+    def __ior__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        if not isinstance(other, SortedSet): return NotImplemented
+        self._assign_merged(other, True, True, True)
+        return self
+
+    def __iand__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        if not isinstance(other, SortedSet): return NotImplemented
+        self._assign_merged(other, False, True, False)
+        return self
+
+    def __isub__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        if not isinstance(other, SortedSet): return NotImplemented
+        self._assign_merged(other, True, False, False)
+        return self
+
+    def __ixor__(self, other: 'SortedSet[T]') -> 'SortedSet[T]':
+        if not isinstance(other, SortedSet): return NotImplemented
+        self._assign_merged(other, True, False, True)
+        return self
+
+    def issubset(self, other: Iterable[T]) -> bool:
+        "Return True if every element of self is in other. / O(N + M)"
+        if not isinstance(other, SortedSet): other = SortedSet(other)
+        return len(self) <= len(other) and not self._merge_sorted(other, True, False, False)
+
+    def issuperset(self, other: Iterable[T]) -> bool:
+        "Return True if every element of other is in self. / O(N + M)"
+        if not isinstance(other, SortedSet): other = SortedSet(other)
+        return other.issubset(self)
+
+    def isdisjoint(self, other: Iterable[T]) -> bool:
+        "Return True if self and other have no elements in common. / O(N + M)"
+        if not isinstance(other, SortedSet): other = SortedSet(other)
+        return not self._merge_sorted(other, False, True, False)
+
+    def enable_stats(self) -> None:
+        "Start counting structural events in self.counters, or reset the counters if already started. The counting methods are set on this instance only, so other instances run at full speed."
+        if self.counters is not None:
+            for k in self.counters: self.counters[k] = 0
+            return
+        c = self.counters = dict.fromkeys(('lookups', 'buckets_visited', 'tree_steps', 'shifted', 'splits', 'merges', 'bucket_deletions', 'rebuilds', 'tree_builds'), 0)
+        cls = type(self)
+
+        def _position(x):
+            c['lookups'] += 1
+            c['buckets_visited'] += 1
+            return cls._position(self, x)
+
+        def _locate(i):
+            c['lookups'] += 1
+            c['buckets_visited'] += 1
+            if len(self.a[0]) <= i < self.size - len(self.a[-1]): c['tree_steps'] += len(self.a).bit_length()
+            return cls._locate(self, i)
+
+        def index(x):
+            c['lookups'] += 1
+            c['buckets_visited'] += 1
+            return cls.index(self, x)
+
+        def index_right(x):
+            c['lookups'] += 1
+            c['buckets_visited'] += 1
+            return cls.index_right(self, x)
+
+        def _insert(a, b, i, x):
+            c['shifted'] += len(a) - i
+            if len(a) >= len(self.a) * self.SPLIT_RATIO: c['splits'] += 1
+            return cls._insert(self, a, b, i, x)
+
+        def _pop(a, b, i):
+            c['shifted'] += len(a) - 1 - i
+            if len(a) == 1: c['bucket_deletions'] += 1
+            return cls._pop(self, a, b, i)
+
+        def _merge_bucket(b):
+            c['merges'] += 1
+            return cls._merge_bucket(self, b)
+
+        def _build(a):
+            c['rebuilds'] += 1
+            return cls._build(self, a)
+
+        def _build_tree():
+            c['tree_builds'] += 1
+            return cls._build_tree(self)
+
+        for f in (_position, _locate, index, index_right, _insert, _pop, _merge_bucket, _build, _build_tree):
+            setattr(self, f.__name__, f)
+
+    def disable_stats(self) -> None:
+        "Stop counting and remove the counting methods from this instance."
+        for name in ('_position', '_locate', 'index', 'index_right', '_insert', '_pop', '_merge_bucket', '_build', '_build_tree', 'counters'):
+            self.__dict__.pop(name, None)
+
+    def stats(self) -> dict:
+        "Return the number of elements and buckets, a histogram {2^k: number of buckets whose size is in [2^k, 2^(k+1))} and the counters of enable_stats() if started. / O(√N)"
+        histogram = {}
         for a in self.a:
-            if a[-1] > x:
-                return ans + bisect_right(a, x)
-            ans += len(a)
+            k = 1 << len(a).bit_length() - 1
+            histogram[k] = histogram.get(k, 0) + 1
+        ans = {'size': self.size, 'buckets': len(self.a), 'histogram': dict(sorted(histogram.items()))}
+        if self.counters is not None: ans.update(self.counters)
         return ans
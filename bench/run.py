@@ -0,0 +1,79 @@
+"""
+Run the example/ workloads at several N with SortedSet / SortedMultiset and with the
+bisect.insort baseline, and write a JSON report.
+
+    python bench/run.py --n 10000 100000 --out bench_report.json
+    pypy3 bench/run.py --workload ABC281-E ABC308-G
+
+Each workload is run --repeat times with the same seed and the minimum time is
+reported. The checksums of both implementations are compared, so a wrong answer is
+reported as an error instead of a fast time.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SortedSet import SortedSet
+from SortedMultiset import SortedMultiset
+from workloads import WORKLOADS, InsortList, InsortSet
+
+IMPLEMENTATIONS = {
+    'SortedSet': (SortedSet, SortedMultiset),
+    'insort': (InsortSet, InsortList),
+}
+
+
+def measure(workload, SET, MULTISET, n: int, seed: int, repeat: int) -> tuple[float, int]:
+    "Return the minimum time of repeat runs and the checksum."
+    best = float('inf')
+    for _ in range(repeat):
+        r = random.Random(seed)
+        start = time.perf_counter()
+        checksum = workload(SET, MULTISET, n, r)
+        best = min(best, time.perf_counter() - start)
+    return best, checksum
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workload', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--impl', nargs='+', choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS))
+    parser.add_argument('--n', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_report.json', help='path of the JSON report')
+    args = parser.parse_args()
+
+    interpreter = f'{platform.python_implementation()} {platform.python_version()}'
+    print(f'{interpreter}')
+    print(f'{"workload":<10} {"N":>8} ' + ' '.join(f'{impl:>10}' for impl in args.impl))
+    results = []
+    failed = False
+    for name in args.workload:
+        for n in args.n:
+            row = {}
+            for impl in args.impl:
+                seconds, checksum = measure(WORKLOADS[name], *IMPLEMENTATIONS[impl], n, args.seed, args.repeat)
+                row[impl] = (seconds, checksum)
+                results.append({'workload': name, 'n': n, 'impl': impl, 'seconds': seconds, 'checksum': checksum})
+            if len({checksum for _, checksum in row.values()}) > 1:
+                failed = True
+                print(f'{name:<10} {n:>8} checksum mismatch: {row}')
+                continue
+            print(f'{name:<10} {n:>8} ' + ' '.join(f'{row[impl][0]:>10.4f}' for impl in args.impl))
+
+    with open(args.out, 'w') as f:
+        json.dump({'interpreter': interpreter, 'platform': platform.platform(), 'seed': args.seed, 'repeat': args.repeat, 'results': results}, f, indent=2)
+    print(f'wrote {args.out}')
+    if failed: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
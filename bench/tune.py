@@ -0,0 +1,100 @@
+"""
+Find good BUCKET_RATIO / SPLIT_RATIO for the current interpreter and element type.
+
+    python bench/tune.py --cls SortedSet --type str --n 100000
+
+Each candidate pair is timed on the same operation mix, and the best pair is printed
+in the form that can be passed to the constructor:
+
+    SortedSet(a, bucket_ratio=..., split_ratio=...)
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from SortedSet import SortedSet
+from SortedMultiset import SortedMultiset
+from BucketList import BucketList
+
+CLASSES = {'SortedSet': SortedSet, 'SortedMultiset': SortedMultiset, 'BucketList': BucketList}
+
+ELEMENTS = {
+    'int': lambda r: r.randrange(1 << 60),
+    'float': lambda r: r.random(),
+    'str': lambda r: '%016x' % r.randrange(1 << 64),
+    'tuple': lambda r: (r.randrange(1000), r.randrange(1 << 30)),
+}
+
+BUCKET_RATIOS = [4, 8, 16, 32, 64, 128]
+SPLIT_FACTORS = [1.5, 2, 3]
+
+
+def workload(cls, data: list, queries: list, bucket_ratio: int, split_ratio: int) -> float:
+    "Build an instance from data, run the operation mix for queries and return the elapsed seconds."
+    start = time.perf_counter()
+    s = cls(data, bucket_ratio=bucket_ratio, split_ratio=split_ratio)
+    if cls is BucketList:
+        for i, x in queries:
+            s.insert(i % (len(s) + 1), x)
+            s[i % len(s)]
+            s.pop(i % len(s))
+    else:
+        for i, x in queries:
+            s.add(x)
+            x in s
+            s.ge(x)
+            s.le(x)
+            s.index(x)
+            s[i % len(s)]
+            s.discard(x)
+    return time.perf_counter() - start
+
+
+def tune(cls=SortedSet, element: str = 'int', n: int = 100000, ops: int = 100000, repeat: int = 3, seed: int = 0) -> list[dict]:
+    "Time every candidate (bucket_ratio, split_ratio) and return the results, fastest first."
+    r = random.Random(seed)
+    make = ELEMENTS[element]
+    data = [make(r) for _ in range(n)]
+    queries = [(r.randrange(1 << 30), make(r)) for _ in range(ops)]
+    results = []
+    for bucket_ratio in BUCKET_RATIOS:
+        for f in SPLIT_FACTORS:
+            split_ratio = int(bucket_ratio * f)
+            seconds = min(workload(cls, data, queries, bucket_ratio, split_ratio) for _ in range(repeat))
+            results.append({'bucket_ratio': bucket_ratio, 'split_ratio': split_ratio, 'seconds': seconds})
+    results.sort(key=lambda x: x['seconds'])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cls', choices=CLASSES, default='SortedSet')
+    parser.add_argument('--type', choices=ELEMENTS, default='int')
+    parser.add_argument('--n', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = tune(CLASSES[args.cls], args.type, args.n, args.ops, args.repeat, args.seed)
+    interpreter = f'{platform.python_implementation()} {platform.python_version()}'
+    print(f'{args.cls}[{args.type}] N={args.n} ops={args.ops} on {interpreter}')
+    print(f'{"bucket_ratio":>12} {"split_ratio":>11} {"seconds":>9}')
+    for x in results:
+        print(f'{x["bucket_ratio"]:>12} {x["split_ratio"]:>11} {x["seconds"]:>9.4f}')
+    best = results[0]
+    print(f'best: {args.cls}(a, bucket_ratio={best["bucket_ratio"]}, split_ratio={best["split_ratio"]})')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cls': args.cls, 'type': args.type, 'n': args.n, 'ops': args.ops, 'interpreter': interpreter, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
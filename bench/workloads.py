@@ -0,0 +1,243 @@
+"""
+Workloads taken from example/, with generated inputs instead of stdin.
+
+Every workload takes the set class to use (SET for SortedSet-like, MULTISET for
+SortedMultiset-like), the input size n and a random.Random, and returns a checksum
+of its output so that different implementations can be checked against each other.
+"""
+import random
+from bisect import bisect_left, bisect_right, insort
+
+
+class InsortList:
+    "Baseline: one sorted list maintained with bisect.insort. Implements the API used by the workloads."
+
+    def __init__(self, a=(), unique: bool = False) -> None:
+        self.unique = unique
+        self.a = sorted(set(a) if unique else a)
+
+    def __len__(self) -> int:
+        return len(self.a)
+
+    def __iter__(self):
+        return iter(self.a)
+
+    def __contains__(self, x) -> bool:
+        i = bisect_left(self.a, x)
+        return i != len(self.a) and self.a[i] == x
+
+    def add(self, x):
+        if self.unique and x in self: return False
+        insort(self.a, x)
+        return True
+
+    def discard(self, x) -> bool:
+        i = bisect_left(self.a, x)
+        if i == len(self.a) or self.a[i] != x: return False
+        del self.a[i]
+        return True
+
+    def __getitem__(self, i):
+        return self.a[i]
+
+    def pop(self, i: int = -1):
+        return self.a.pop(i)
+
+    def index(self, x) -> int:
+        return bisect_left(self.a, x)
+
+    def index_right(self, x) -> int:
+        return bisect_right(self.a, x)
+
+    def lt(self, x):
+        i = bisect_left(self.a, x)
+        if i: return self.a[i - 1]
+
+    def le(self, x):
+        i = bisect_right(self.a, x)
+        if i: return self.a[i - 1]
+
+    def gt(self, x):
+        i = bisect_right(self.a, x)
+        if i != len(self.a): return self.a[i]
+
+    def ge(self, x):
+        i = bisect_left(self.a, x)
+        if i != len(self.a): return self.a[i]
+
+
+class InsortSet(InsortList):
+    def __init__(self, a=()) -> None:
+        super().__init__(a, True)
+
+
+def abc119_d(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC119-D.py: le / ge on two static sets."
+    INF = 1 << 60
+    s = SET([-INF] + [r.randrange(10**10) for _ in range(n)] + [INF])
+    t = SET([-INF] + [r.randrange(10**10) for _ in range(n)] + [INF])
+    ans = 0
+    for _ in range(n):
+        x = r.randrange(10**10)
+        s0 = x - s.le(x)
+        s1 = s.ge(x) - x
+        t0 = x - t.le(x)
+        t1 = t.ge(x) - x
+        ans += min(max(s0, t0), max(s1, t1), s0 + t1 + min(s0, t1), s1 + t0 + min(s1, t0))
+    return ans
+
+
+def abc217_d(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC217-D.py: add and gt / lt on a growing set of cut points."
+    L = 10**9
+    s = SET([0, L])
+    ans = 0
+    for _ in range(n):
+        x = r.randrange(1, L)
+        if r.random() < 0.5: s.add(x)
+        else: ans += s.gt(x) - s.lt(x)
+    return ans
+
+
+def abc241_d(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC241-D.py: add, index / index_right and __getitem__ on a multiset."
+    A = MULTISET()
+    ans = 0
+    for _ in range(n):
+        t = r.randrange(3)
+        x = r.randrange(10**18)
+        k = r.randrange(1, 6)
+        if t == 0 or not A: A.add(x)
+        elif t == 1:
+            i = A.index_right(x) - k
+            ans += -1 if i < 0 else A[i]
+        else:
+            i = A.index(x) + k - 1
+            ans += -1 if i >= len(A) else A[i]
+    return ans
+
+
+def abc245_e(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC245-E.py: add, ge and discard on a multiset."
+    MASK = (1 << 30) - 1
+    A = sorted((r.randrange(10**9) << 30 | r.randrange(10**9) for _ in range(n)), reverse=True)
+    C = sorted(r.randrange(10**9) << 30 | r.randrange(10**9) for _ in range(n))
+    C.insert(0, 0)
+    s = MULTISET()
+    ans = 0
+    for xy in A:
+        while C[-1] >= xy:
+            s.add(C.pop() & MASK)
+        a = s.ge(xy & MASK)
+        if a is None: continue
+        s.discard(a)
+        ans += a
+    return ans
+
+
+def abc281_e(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC281-E.py: sum of the K smallest in a sliding window with two multisets."
+    M = max(2, n // 10)
+    K = M // 2
+    A = [r.randrange(10**9) for _ in range(n)]
+    first = sorted(A[:M])
+    low = MULTISET(first[:K])
+    high = MULTISET(first[K:])
+    ans = sum(first[:K])
+    total = ans
+    for i in range(M, n):
+        x = A[i]
+        if x < low[-1]:
+            ans -= low[-1]
+            high.add(low.pop(-1))
+            ans += x
+            low.add(x)
+        else:
+            high.add(x)
+        x = A[i - M]
+        if x < high[0]:
+            ans -= x
+            low.discard(x)
+            ans += high[0]
+            low.add(high.pop(0))
+        else:
+            high.discard(x)
+        total += ans
+    return total
+
+
+def abc308_g(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC308-G.py: minimum XOR of adjacent elements with neighbour lookups."
+    A = MULTISET()
+    X = MULTISET()
+    present = []
+
+    def add(a):
+        A.add(a)
+        i = A.index(a)
+        l = A[i - 1] if i else None
+        r = A[i + 1] if i + 1 < len(A) else None
+        if l is not None and r is not None: X.discard(l ^ r)
+        if l is not None: X.add(l ^ a)
+        if r is not None: X.add(r ^ a)
+
+    def erase(a):
+        i = A.index(a)
+        l = A[i - 1] if i else None
+        r = A[i + 1] if i + 1 < len(A) else None
+        A.discard(a)
+        if l is not None and r is not None: X.add(l ^ r)
+        if l is not None: X.discard(l ^ a)
+        if r is not None: X.discard(r ^ a)
+
+    ans = 0
+    for _ in range(n):
+        t = r.randrange(3)
+        if t == 0 or len(present) < 2:
+            x = r.randrange(1 << 30)
+            add(x)
+            present.append(x)
+        elif t == 1:
+            j = r.randrange(len(present))
+            present[j], present[-1] = present[-1], present[j]
+            erase(present.pop())
+        else:
+            ans += X[0]
+    return ans
+
+
+def abc370_d(SET, MULTISET, n: int, r: random.Random) -> int:
+    "example/ABC370-D.py: discard and lt / gt on many small sets."
+    H = W = max(2, int(n ** 0.5))
+    rows = [SET(range(W)) for _ in range(H)]
+    cols = [SET(range(H)) for _ in range(W)]
+    ans = H * W
+
+    def remove(x, y):
+        nonlocal ans
+        if x is None or y is None: return
+        rows[x].discard(y)
+        cols[y].discard(x)
+        ans -= 1
+
+    for _ in range(n):
+        x = r.randrange(H)
+        y = r.randrange(W)
+        if y in rows[x]: remove(x, y)
+        else:
+            remove(x, rows[x].lt(y))
+            remove(x, rows[x].gt(y))
+            remove(cols[y].lt(x), y)
+            remove(cols[y].gt(x), y)
+    return ans
+
+
+WORKLOADS = {
+    'ABC119-D': abc119_d,
+    'ABC217-D': abc217_d,
+    'ABC241-D': abc241_d,
+    'ABC245-E': abc245_e,
+    'ABC281-E': abc281_e,
+    'ABC308-G': abc308_g,
+    'ABC370-D': abc370_d,
+}
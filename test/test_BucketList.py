@@ -1,7 +1,10 @@
+import pickle
 import pytest
 import sys
 import os
 import random
+import tracemalloc
+from array import array
 
 # Add the parent directory to the path to import BucketList
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -16,6 +19,24 @@ def test_init():
     bl = BucketList()
     assert list(bl) == []
 
+def test_typecode():
+    py_l = [random.randint(0, 100) for _ in range(1000)]
+    bl = BucketList(py_l, typecode='i')
+    assert all(type(a) is array and a.typecode == 'i' for a in bl.a)
+    for _ in range(1000):
+        i = random.randint(-len(py_l), len(py_l))
+        bl.insert(i, i)
+        py_l.insert(i, i)
+    del bl[5:50]
+    del py_l[5:50]
+    bl.reverse()
+    py_l.reverse()
+    assert list(bl) == py_l
+    assert all(type(a) is array for a in bl.copy().a)
+    bl = BucketList(typecode='d')
+    bl.append(1.5)
+    assert all(type(a) is array and a.typecode == 'd' for a in bl.a)
+
 def test_iter_reversed():
     data = [1, 2, 3, 4, 5]
     bl = BucketList(data)
@@ -99,6 +120,16 @@ def test_getitem():
     with pytest.raises(IndexError):
         bl[-6]
 
+def test_islice():
+    py_l = [random.randint(0, 100) for _ in range(1000)]
+    bl = BucketList(py_l)
+    for _ in range(200):
+        i, j = random.randint(-1005, 1005), random.randint(-1005, 1005)
+        assert list(bl.islice(i, j)) == py_l[i:j]
+        assert list(bl.islice(i, j, reverse=True)) == py_l[i:j][::-1]
+    assert list(bl.islice()) == py_l
+    assert list(BucketList().islice()) == []
+
 def test_pop():
     bl = BucketList([10, 20, 30, 40, 50])
     assert bl.pop(2) == 30
@@ -113,6 +144,23 @@ def test_pop():
     with pytest.raises(IndexError):
         bl.pop(-3)
 
+def test_delitem():
+    for _ in range(100):
+        py_l = [random.randint(0, 100) for _ in range(random.randint(0, 1000))]
+        bl = BucketList(py_l)
+        i, j = random.randint(-len(py_l) - 5, len(py_l) + 5), random.randint(-len(py_l) - 5, len(py_l) + 5)
+        del bl[i:j]
+        del py_l[i:j]
+        assert list(bl) == py_l and len(bl) == len(py_l) and all(bl.a)
+        if py_l:
+            i = random.randint(-len(py_l), len(py_l) - 1)
+            del bl[i]
+            del py_l[i]
+        del bl[::-2]
+        del py_l[::-2]
+        assert list(bl) == py_l
+        assert all(bl[k] == py_l[k] for k in range(len(py_l)))
+
 def test_count():
     bl = BucketList([1, 2, 2, 3, 2, 4])
     assert bl.count(1) == 1
@@ -162,6 +210,24 @@ def test_copy():
     assert list(bl1) == [1, 2, 3]
     assert list(bl2) == [1, 2, 3, 4]
 
+def test_tree():
+    bl = BucketList(range(1000))
+    py_l = list(range(1000))
+    for _ in range(3000):
+        if random.random() < 0.5:
+            idx = random.randint(-len(py_l), len(py_l))
+            bl.insert(idx, idx)
+            py_l.insert(idx, idx)
+        elif py_l:
+            idx = random.randint(-len(py_l), len(py_l) - 1)
+            assert bl.pop(idx) == py_l.pop(idx)
+        if py_l:
+            idx = random.randint(-len(py_l), len(py_l) - 1)
+            assert bl[idx] == py_l[idx]
+        if bl.tree is not None:
+            assert bl.tree == BucketList._build_tree(bl)
+    assert list(bl) == py_l
+
 def test_empty_list_operations():
     bl = BucketList()
     with pytest.raises(IndexError):
@@ -205,6 +271,107 @@ def test_bucket_split_and_merge():
         BucketList.BUCKET_RATIO = original_bucket_ratio
         BucketList.SPLIT_RATIO = original_split_ratio
 
+def test_merge_small_buckets():
+    bl = BucketList(range(10000))
+    py_l = list(range(10000))
+    for _ in range(9900):
+        i = random.randrange(len(py_l))
+        assert bl.pop(i) == py_l.pop(i)
+    assert len(bl.a) < 10
+    assert list(bl) == py_l
+    bl = BucketList(range(10000))
+    del bl[50:9950]
+    assert list(bl) == list(range(50)) + list(range(9950, 10000))
+    assert len(bl.a) < 10
+
+def test_rebalance():
+    bl = BucketList()
+    for x in range(20000):
+        bl.append(x)
+    assert bl.built_size * 2 >= len(bl)
+    assert len(bl.a) <= 2 * len(BucketList(range(20000)).a)
+    for _ in range(19900):
+        bl.pop(0)
+    assert len(bl.a) <= 2 * len(BucketList(range(100)).a)
+    assert list(bl) == list(range(19900, 20000))
+    bl.rebalance()
+    assert bl.built_size == 100
+    assert list(map(len, bl.a)) == list(map(len, BucketList(range(100)).a))
+    # typed buckets are rebuilt without boxing the elements
+    s = BucketList(range(100000), typecode='q')
+    tracemalloc.start()
+    s.rebalance()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * 8 * 100000 and all(a.typecode == 'q' for a in s.a)
+
+
+def test_instance_ratios():
+    s = BucketList(range(1000), bucket_ratio=1, split_ratio=2)
+    assert s.BUCKET_RATIO == 1 and s.SPLIT_RATIO == 2
+    assert BucketList.BUCKET_RATIO == 16 and BucketList.SPLIT_RATIO == 24
+    assert len(s.a) == 32
+    assert len(BucketList(range(1000)).a) == 8
+    for x in range(1000, 2000):
+        s.append(x)
+    assert max(map(len, s.a)) <= 2 * len(s.a)
+    assert list(s) == list(range(2000))
+
+def test_stats():
+    bl = BucketList(range(1000))
+    assert bl.stats() == {'size': 1000, 'buckets': 8, 'histogram': {64: 8}}
+    bl.enable_stats()
+    assert 'insert' not in bl.__dict__ and '_insert' in bl.__dict__
+    for x in range(1000):
+        bl.insert(0, x)
+    st = bl.stats()
+    assert st['splits'] > 0 and st['shifted'] > 0
+    assert st['buckets'] == len(bl.a) and sum(st['histogram'].values()) == len(bl.a)
+    assert bl[1500] == 500 and bl.stats()['lookups'] == st['lookups'] + 1
+    shifted = st['shifted']
+    for _ in range(1950):
+        bl.pop()
+    st = bl.stats()
+    assert st['rebuilds'] > 0 and st['shifted'] == shifted
+    assert list(bl) == list(range(999, 949, -1))
+    bl.disable_stats()
+    assert bl.counters is None and '_insert' not in bl.__dict__
+    assert 'splits' not in bl.stats()
+
+def test_pickle():
+    bl = BucketList(range(1000))
+    bl.insert(10, -1)
+    bl[500]
+    bl.enable_stats()
+    t = pickle.loads(pickle.dumps(bl))
+    assert t.a == bl.a and t.tree is None and t.counters is None
+    assert list(t) == list(bl) and t[500] == bl[500]
+
+def test_pickle_old_format():
+    # the previous release pickled only a and size
+    t = BucketList.__new__(BucketList)
+    t.__setstate__({'a': [[0, 1, 2], [3, 4]], 'size': 5})
+    t.append(5)
+    t.insert(0, -1)
+    assert t.pop(1) == 0 and t[3] == 3 and list(t.copy()) == [-1, 1, 2, 3, 4, 5]
+
+def test_copy_on_write():
+    bl = BucketList(range(2000))
+    t = bl.copy()
+    assert all(x is y for x, y in zip(bl.a, t.a))
+    t.insert(0, -1)
+    assert bl.a[0] is not t.a[0] and bl.a[1] is t.a[1]
+    snap = t.snapshot()
+    t.reverse()
+    del t[100:200]
+    t.pop(500)
+    assert list(bl) == list(range(2000))
+    assert list(snap) == [-1] + list(range(2000))
+    py_t = list(range(1999, -1, -1)) + [-1]
+    del py_t[100:200]
+    py_t.pop(500)
+    assert list(t) == py_t
+
 def test_large_random_ops():
     bl = BucketList()
     py_l = []
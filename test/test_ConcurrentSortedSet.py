@@ -0,0 +1,94 @@
+import pytest
+import sys
+import os
+import random
+import threading
+
+# Add the parent directory to the path to import ConcurrentSortedSet
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ConcurrentSortedSet import ConcurrentSortedSet, ConcurrentSortedMultiset, RWLock
+
+def test_basic_operations():
+    s = ConcurrentSortedSet([5, 1, 3])
+    assert list(s) == [1, 3, 5] and list(reversed(s)) == [5, 3, 1] and len(s) == 3
+    assert s.add(2) and not s.add(2)
+    assert 2 in s and 4 not in s
+    assert s[0] == 1 and s[-1] == 5
+    assert s.lt(3) == 2 and s.le(3) == 3 and s.gt(3) == 5 and s.ge(4) == 5
+    assert s.index(3) == 2 and s.index_right(3) == 3
+    assert s.contains_many([1, 4]) == [True, False] and s.index_many([0, 6]) == [0, 4]
+    assert list(s.irange(2, 4)) == [2, 3] and list(s.islice(1, 3)) == [2, 3]
+    assert s.add_many([0, 1, 9]) == [True, False, True]
+    assert s.discard_many([9, 9]) == [True, False]
+    s.update([7, 8])
+    assert s.discard_range(7, 8) == 2
+    assert s.pop() == 5 and s.discard(0) and not s.discard(0)
+    del s[0]
+    assert list(s) == [2, 3] and str(s) == "{2, 3}"
+    with s.batch() as t:
+        t.add(10)
+        t.add(11)
+    assert list(s) == [2, 3, 10, 11]
+
+def test_multiset():
+    s = ConcurrentSortedMultiset([1, 1, 2], typecode='q')
+    s.add(1)
+    assert s.count(1) == 3 and len(s) == 4
+    assert s.discard_many([1, 1, 3]) == [True, True, False]
+    assert list(s) == [1, 2]
+
+def test_snapshot_iteration():
+    s = ConcurrentSortedSet(range(1000))
+    it = iter(s)
+    snap = s.snapshot()
+    s.discard_range(0, 499)
+    s.add(-1)
+    assert list(it) == list(range(1000)) and list(snap) == list(range(1000))
+    assert list(s) == [-1] + list(range(500, 1000))
+
+def test_rwlock():
+    lock = RWLock()
+    both_reading = threading.Barrier(2, timeout=5)
+    def reader():
+        with lock.read: both_reading.wait()
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    log = []
+    lock.acquire_read()
+    def write():
+        with lock.write: log.append('write')
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not lock.waiting: pass
+    log.append('read')
+    lock.release_read()
+    writer.join()
+    assert log == ['read', 'write']
+
+def test_threads():
+    s = ConcurrentSortedSet()
+    N = 2000
+    def writer(k):
+        for x in range(k, N, 4):
+            s.add(x)
+            if x % 3 == 0: s.discard(x)
+        s.add_many(range(N + k, 2 * N, 4))
+    results = []
+    def reader():
+        for _ in range(2000):
+            x = random.randrange(2 * N)
+            results.append((x, s.ge(x), list(s.islice(0, 50))))
+    errors = []
+    def run(f, *args):
+        try: f(*args)
+        except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=run, args=(writer, k)) for k in range(4)] + [threading.Thread(target=run, args=(reader,)) for _ in range(2)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors and len(results) == 4000
+    for x, y, snap in results:
+        assert y is None or y >= x
+        assert snap == sorted(snap)
+    assert list(s) == [x for x in range(N) if x % 3] + list(range(N, 2 * N))
@@ -0,0 +1,114 @@
+import pytest
+import sys
+import os
+import random
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# Add the parent directory to the path to import CountedSortedMultiset
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from CountedSortedMultiset import CountedSortedMultiset
+
+def test_init():
+    s = CountedSortedMultiset([3, 1, 2, 2, 3, 3])
+    assert list(s) == [1, 2, 2, 3, 3, 3]
+    assert list(s.items()) == [(1, 1), (2, 2), (3, 3)]
+    assert len(s) == 6
+    assert s.num_distinct() == 3
+    s = CountedSortedMultiset()
+    assert list(s) == []
+    assert len(s) == 0
+
+def test_iter_reversed():
+    s = CountedSortedMultiset([1, 2, 2, 3])
+    assert list(s) == [1, 2, 2, 3]
+    assert list(reversed(s)) == [3, 2, 2, 1]
+
+def test_repr_str():
+    s = CountedSortedMultiset([1, 2, 2])
+    assert repr(s).startswith("CountedSortedMultiset")
+    assert str(s) == "{1, 2, 2}"
+
+def test_add_discard_count():
+    s = CountedSortedMultiset()
+    s.add(5, 3)
+    s.add(1)
+    s.add(5)
+    assert list(s) == [1, 5, 5, 5, 5]
+    assert s.count(5) == 4
+    assert s.count(1) == 1
+    assert s.count(2) == 0
+    assert s.discard(5, 2) == 2
+    assert s.count(5) == 2
+    assert s.discard(5, 10) == 2
+    assert 5 not in s
+    assert s.discard(5) == 0
+    assert s.num_distinct() == 1
+    assert len(s) == 1
+
+def test_lt_le_gt_ge():
+    s = CountedSortedMultiset([10, 20, 30, 30, 40, 50])
+    assert s.lt(30) == 20
+    assert s.le(30) == 30
+    assert s.gt(30) == 40
+    assert s.ge(35) == 40
+    assert s.lt(10) is None
+    assert s.gt(50) is None
+    assert CountedSortedMultiset().le(1) is None
+
+def test_getitem_pop_index():
+    s = CountedSortedMultiset([10, 20, 30, 30, 40, 50])
+    assert s[2] == 30
+    assert s[3] == 30
+    assert s[-1] == 50
+    assert s.index(30) == 2
+    assert s.index_right(30) == 4
+    assert s.pop(2) == 30
+    assert list(s) == [10, 20, 30, 40, 50]
+    assert s.pop() == 50
+    with pytest.raises(IndexError):
+        s[4]
+    with pytest.raises(IndexError):
+        s.pop(-5)
+
+def test_large_random_ops():
+    original_bucket_ratio = CountedSortedMultiset.BUCKET_RATIO
+    original_split_ratio = CountedSortedMultiset.SPLIT_RATIO
+    try:
+        CountedSortedMultiset.BUCKET_RATIO = 1
+        CountedSortedMultiset.SPLIT_RATIO = 4
+        s = CountedSortedMultiset()
+        py_c = Counter()
+        for _ in range(5000):
+            op = random.randint(0, 5)
+            val = random.randint(0, 300)
+            if op <= 1:
+                k = random.randint(1, 5)
+                s.add(val, k)
+                py_c[val] += k
+            elif op == 2:
+                k = random.randint(1, 5)
+                assert s.discard(val, k) == min(k, py_c[val])
+                py_c[val] -= min(k, py_c[val])
+            elif op == 3 and len(s):
+                py_s = sorted(py_c.elements())
+                idx = random.randint(-len(py_s), len(py_s) - 1)
+                assert s[idx] == py_s[idx]
+                assert s.pop(idx) == py_s[idx]
+                py_c[py_s[idx]] -= 1
+            elif op == 4:
+                py_s = sorted(py_c.elements())
+                assert s.index(val) == bisect_left(py_s, val)
+                assert s.index_right(val) == bisect_right(py_s, val)
+            elif op == 5:
+                assert s.count(val) == py_c[val]
+            py_c = +py_c
+            assert len(s) == sum(py_c.values())
+            assert s.num_distinct() == len(py_c)
+            assert s.sums == [sum(c) for c in s.c]
+            assert s.maxes == [a[-1] for a in s.a]
+        assert list(s) == sorted(py_c.elements())
+    finally:
+        CountedSortedMultiset.BUCKET_RATIO = original_bucket_ratio
+        CountedSortedMultiset.SPLIT_RATIO = original_split_ratio
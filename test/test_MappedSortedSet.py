@@ -0,0 +1,77 @@
+import pytest
+import sys
+import os
+import random
+from bisect import bisect_left, bisect_right
+
+# Add the parent directory to the path to import MappedSortedSet
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from MappedSortedSet import MappedSortedSet
+from SortedSet import SortedSet
+from SortedMultiset import SortedMultiset
+
+def mapped(tmp_path, s, typecode='q', index_step=None):
+    path = tmp_path / 'set.bin'
+    with open(path, 'wb') as f:
+        s.dump(f, typecode)
+    return MappedSortedSet(str(path), index_step)
+
+def test_empty(tmp_path):
+    with mapped(tmp_path, SortedSet()) as m:
+        assert len(m) == 0 and list(m) == []
+        assert 1 not in m
+        assert m.lt(1) is None and m.le(1) is None and m.gt(1) is None and m.ge(1) is None
+        assert m.index(1) == 0 and m.index_right(1) == 0
+        assert list(m.irange()) == []
+        with pytest.raises(IndexError):
+            m[0]
+
+@pytest.mark.parametrize('index_step', [1, 3, 64, 1000])
+def test_queries(tmp_path, index_step):
+    a = sorted(random.sample(range(-10000, 10000), 3000))
+    with mapped(tmp_path, SortedSet(a), index_step=index_step) as m:
+        assert len(m) == len(a) and list(m) == a and list(reversed(m)) == a[::-1]
+        assert m == a and m.typecode == 'q'
+        assert [m[i] for i in range(-len(a), len(a))] == a + a
+        for x in range(-10010, 10010, 7):
+            i, j = bisect_left(a, x), bisect_right(a, x)
+            assert (x in m) == (i != j)
+            assert m.index(x) == i and m.index_right(x) == j
+            assert m.lt(x) == (a[i - 1] if i else None)
+            assert m.le(x) == (a[j - 1] if j else None)
+            assert m.gt(x) == (a[j] if j < len(a) else None)
+            assert m.ge(x) == (a[i] if i < len(a) else None)
+
+def test_irange_islice(tmp_path):
+    a = list(range(0, 1000, 3))
+    with mapped(tmp_path, SortedSet(a), index_step=8) as m:
+        assert list(m.irange(30, 60)) == [x for x in a if 30 <= x <= 60]
+        assert list(m.irange(30, 60, (False, False))) == [x for x in a if 30 < x < 60]
+        assert list(m.irange(hi=10, reverse=True)) == [9, 6, 3, 0]
+        assert list(m.irange(lo=990)) == [990, 993, 996, 999]
+        assert list(m.islice(5, 10)) == a[5:10]
+        assert list(m.islice(-3, reverse=True)) == a[-3:][::-1]
+
+def test_float_and_multiset(tmp_path):
+    a = [x / 8 for x in range(-100, 100)]
+    with mapped(tmp_path, SortedSet(a), 'd', 5) as m:
+        assert m.typecode == 'd' and list(m) == a
+        assert 0.125 in m and 0.1 not in m and m.ge(0.1) == 0.125
+    with mapped(tmp_path, SortedMultiset([1, 1, 2, 2, 2, 3]), 'i', 2) as m:
+        assert m.index(2) == 2 and m.index_right(2) == 5
+
+def test_close_with_suspended_iterators(tmp_path):
+    m = mapped(tmp_path, SortedSet(range(1000)))
+    its = [m.irange(10, 500), m.islice(5, 50, reverse=True), iter(m), reversed(m)]
+    assert [next(it) for it in its] == [10, 49, 0, 999]
+    m.close()
+    for it in its:
+        with pytest.raises(ValueError):
+            next(it)
+
+def test_not_a_set_file(tmp_path):
+    path = tmp_path / 'x.bin'
+    path.write_bytes(b'\0' * 32)
+    with pytest.raises(ValueError):
+        MappedSortedSet(str(path))
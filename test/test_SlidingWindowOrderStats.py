@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+import math
+import random
+from fractions import Fraction
+
+# Add the parent directory to the path to import SlidingWindowOrderStats
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from SlidingWindowOrderStats import SlidingWindowOrderStats, run_windows
+
+def test_k_smallest():
+    # ABC281-E
+    A = [random.randrange(100) for _ in range(2000)]
+    M, K = 50, 7
+    w = SlidingWindowOrderStats(M, k=K)
+    for i, x in enumerate(A):
+        evicted = w.push(x)
+        assert evicted == (A[i - M] if i >= M else None)
+        window = sorted(A[max(0, i - M + 1) : i + 1])
+        assert len(w) == len(window)
+        assert w.kth_sum() == sum(window[:K])
+        assert w.kth() == (window[K - 1] if len(window) >= K else None)
+
+def test_quantile():
+    A = [random.random() for _ in range(1000)]
+    for q in [0.5, 0.95, 1, 0.07, 0.14, 0.55]:
+        w = SlidingWindowOrderStats(100, q=q)
+        for i, x in enumerate(A):
+            w.push(x)
+            window = sorted(A[max(0, i - 99) : i + 1])
+            assert w.kth() == window[max(1, math.ceil(Fraction(str(q)) * len(window))) - 1]
+    # ceil(q * n) in floating point is one too large for these
+    for q, n, k in [(0.07, 100, 7), (0.14, 50, 7), (0.55, 100, 55)]:
+        w = SlidingWindowOrderStats(q=q)
+        for x in range(n): w.push(x)
+        assert len(w.low) == k and w.kth() == k - 1
+
+def test_evict():
+    w = SlidingWindowOrderStats(k=3)
+    assert w.kth() is None and w.kth_sum() == 0
+    for x in [5, 1, 4, 1, 3]:
+        w.push(x)
+    assert w.kth() == 3 and w.kth_sum() == 5
+    assert w.evict(1) and not w.evict(2)
+    assert w.kth() == 4 and w.kth_sum() == 8
+    assert w.evict(5) and w.evict(4)
+    assert w.kth() is None and w.kth_sum() == 4 and len(w) == 2
+    with pytest.raises(ValueError):
+        SlidingWindowOrderStats(10)
+
+def test_run_windows():
+    A = [random.randrange(1000) for _ in range(500)]
+    windows = [SlidingWindowOrderStats(10, q=0.5), SlidingWindowOrderStats(30, k=3)]
+    for i, ans in enumerate(run_windows(iter(A), windows)):
+        w10 = sorted(A[max(0, i - 9) : i + 1])
+        w30 = sorted(A[max(0, i - 29) : i + 1])
+        assert ans[0][0] == w10[math.ceil(len(w10) / 2) - 1]
+        assert ans[1] == (w30[2] if len(w30) >= 3 else None, sum(w30[:3]))
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import os
+import random
+
+# Add the parent directory to the path to import SortedDict
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from SortedDict import SortedDict
+
+def test_init():
+    d = SortedDict({3: 'c', 1: 'a', 2: 'b'})
+    assert list(d) == [1, 2, 3]
+    assert list(d.items()) == [(1, 'a'), (2, 'b'), (3, 'c')]
+    d = SortedDict([(2, 'x'), (1, 'y'), (2, 'z')])
+    assert list(d.items()) == [(1, 'y'), (2, 'z')]
+    d = SortedDict()
+    assert len(d) == 0
+    assert list(d) == []
+
+def test_eq_repr_str():
+    d = SortedDict({2: 'b', 1: 'a'})
+    assert d == SortedDict({1: 'a', 2: 'b'})
+    assert d == {1: 'a', 2: 'b'}
+    assert d != {1: 'a'}
+    assert repr(d).startswith("SortedDict")
+    assert str(d) == "{1: 'a', 2: 'b'}"
+
+def test_getitem_setitem_delitem():
+    d = SortedDict()
+    d[5] = 'e'
+    d[1] = 'a'
+    d[5] = 'E'
+    assert list(d.items()) == [(1, 'a'), (5, 'E')]
+    assert d[5] == 'E'
+    assert d.get(3) is None
+    assert d.get(3, 'x') == 'x'
+    assert 1 in d and 3 not in d
+    del d[1]
+    assert list(d) == [5]
+    with pytest.raises(KeyError):
+        del d[1]
+    with pytest.raises(KeyError):
+        d[1]
+    assert d.pop(5) == 'E'
+    assert d.pop(5, None) is None
+    with pytest.raises(KeyError):
+        d.pop(5)
+    assert d.setdefault(2, 'b') == 'b'
+    assert d.setdefault(2, 'c') == 'b'
+    d.update({3: 'c', 2: 'B'})
+    d.update([(0, 'z')])
+    assert list(d.items()) == [(0, 'z'), (2, 'B'), (3, 'c')]
+    d.clear()
+    assert len(d) == 0 and list(d) == []
+
+def test_range_views():
+    d = SortedDict((i, i * i) for i in range(0, 20, 2))
+    assert list(d.keys(3, 9)) == [4, 6, 8]
+    assert list(d.keys(4, 8, (False, True))) == [6, 8]
+    assert list(d.values(3, 9, reverse=True)) == [64, 36, 16]
+    assert list(d.items(hi=2)) == [(0, 0), (2, 4)]
+    assert list(reversed(d)) == list(range(18, -1, -2))
+
+def test_peekitem_popitem():
+    d = SortedDict({i: str(i) for i in range(10)})
+    assert d.peekitem() == (9, '9')
+    assert d.peekitem(0) == (0, '0')
+    assert d.popitem() == (9, '9')
+    assert d.popitem(3) == (3, '3')
+    assert 3 not in d and len(d) == 8
+    assert d.index(4) == 3
+    assert d.index_right(4) == 4
+    with pytest.raises(IndexError):
+        SortedDict().popitem()
+
+def test_lt_le_gt_ge():
+    d = SortedDict({10: 'a', 20: 'b', 30: 'c'})
+    assert d.lt(20) == (10, 'a')
+    assert d.le(20) == (20, 'b')
+    assert d.gt(20) == (30, 'c')
+    assert d.ge(25) == (30, 'c')
+    assert d.lt(10) is None
+    assert d.gt(30) is None
+
+def test_large_random_ops():
+    d = SortedDict()
+    py_d = {}
+    for _ in range(3000):
+        op = random.randint(0, 3)
+        k = random.randint(0, 500)
+        if op <= 1:
+            v = random.random()
+            d[k] = v
+            py_d[k] = v
+        elif op == 2:
+            assert d.pop(k, None) == py_d.pop(k, None)
+        elif op == 3 and py_d:
+            keys = sorted(py_d)
+            i = random.randint(-len(keys), len(keys) - 1)
+            assert d.peekitem(i) == (keys[i], py_d[keys[i]])
+            lo = [x for x in keys if x <= k]
+            assert d.le(k) == ((lo[-1], py_d[lo[-1]]) if lo else None)
+    assert list(d.items()) == sorted(py_d.items())
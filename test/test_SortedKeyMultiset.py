@@ -0,0 +1,96 @@
+import pytest
+import sys
+import os
+import random
+from bisect import bisect_left, bisect_right
+
+# Add the parent directory to the path to import SortedKeyMultiset
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from SortedKeyMultiset import SortedKeyMultiset
+
+UNIQUE = False
+
+def test_init():
+    s = SortedKeyMultiset(['ccc', 'a', 'bb', 'dd'], key=len)
+    assert list(s) == ['a', 'bb', 'dd', 'ccc']
+    assert s.k == [[1, 2, 2, 3]]
+    s = SortedKeyMultiset([3, 1, 2])
+    assert list(s) == [1, 2, 3]
+    s = SortedKeyMultiset(['x', 'y', 'x'], key=len)
+    assert list(s) == (['x', 'y'] if UNIQUE else ['x', 'y', 'x'])
+    s = SortedKeyMultiset(key=len)
+    assert list(s) == []
+
+def test_repr_str():
+    s = SortedKeyMultiset([2, 1])
+    assert repr(s).startswith("SortedKeyMultiset")
+    assert str(s) == "{1, 2}"
+
+def test_add_discard_contains():
+    s = SortedKeyMultiset(key=lambda r: r[0])
+    s.add((2, 'b'))
+    s.add((1, 'a'))
+    s.add((2, 'c'))
+    assert list(s) == [(1, 'a'), (2, 'b'), (2, 'c')]
+    assert s.add((2, 'b')) is (False if UNIQUE else None)
+    assert len(s) == (3 if UNIQUE else 4)
+    assert (2, 'c') in s
+    assert (2, 'd') not in s
+    assert s.discard((2, 'c'))
+    assert not s.discard((2, 'd'))
+    assert (2, 'c') not in s
+    assert (2, 'b') in s
+
+def test_key_queries():
+    s = SortedKeyMultiset([(k, str(k)) for k in [10, 20, 30, 40]], key=lambda r: r[0])
+    assert s.ge_key(25) == (30, '30')
+    assert s.gt_key(30) == (40, '40')
+    assert s.le_key(25) == (20, '20')
+    assert s.lt_key(20) == (10, '10')
+    assert s.lt_key(10) is None
+    assert s.gt_key(40) is None
+    assert s.ge((30, 'anything')) == (30, '30')
+    assert s.index_key(30) == 2
+    assert s.index_right_key(30) == 3
+    assert s.index((30, '')) == 2
+    assert s.index_right((30, '')) == 3
+    assert list(s.irange_key(15, 35)) == [(20, '20'), (30, '30')]
+    assert list(s.irange_key(20, 40, (False, True), reverse=True)) == [(40, '40'), (30, '30')]
+    assert s[1] == (20, '20')
+    assert s.pop(1) == (20, '20')
+    assert s[-1] == (40, '40')
+
+def test_large_random_ops():
+    original_bucket_ratio = SortedKeyMultiset.BUCKET_RATIO
+    original_split_ratio = SortedKeyMultiset.SPLIT_RATIO
+    try:
+        SortedKeyMultiset.BUCKET_RATIO = 1
+        SortedKeyMultiset.SPLIT_RATIO = 4
+        s = SortedKeyMultiset(key=lambda r: r[0])
+        py_s = []
+        for _ in range(3000):
+            op = random.randint(0, 3)
+            x = (random.randint(0, 30), random.randint(0, 3))
+            if op <= 1:
+                added = s.add(x)
+                if not UNIQUE or x not in py_s:
+                    i = bisect_right([r[0] for r in py_s], x[0])
+                    py_s.insert(i, x)
+                    assert added is not False
+                else:
+                    assert added is False
+            elif op == 2:
+                assert s.discard(x) == (x in py_s)
+                if x in py_s: py_s.remove(x)
+            elif op == 3 and py_s:
+                i = random.randint(-len(py_s), len(py_s) - 1)
+                assert s.pop(i) == py_s.pop(i)
+            keys = [r[0] for r in py_s]
+            assert s.index_key(x[0]) == bisect_left(keys, x[0])
+            assert s.index_right_key(x[0]) == bisect_right(keys, x[0])
+            assert s.maxes == [k[-1] for k in s.k]
+        assert list(s) == py_s
+    finally:
+        SortedKeyMultiset.BUCKET_RATIO = original_bucket_ratio
+        SortedKeyMultiset.SPLIT_RATIO = original_split_ratio
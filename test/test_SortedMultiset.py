@@ -1,12 +1,19 @@
+import io
+import pickle
 import pytest
 import sys
 import os
 import random
+import tracemalloc
+from array import array
+from collections import Counter
+from bisect import bisect_left, bisect_right
 
 # Add the parent directory to the path to import SortedMultiset
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from SortedMultiset import SortedMultiset
+from SortedSet import SortedSet
 
 def test_init():
     s = SortedMultiset([1, 4, 3, 2, 5])
@@ -18,6 +25,33 @@ def test_init():
     s = SortedMultiset([5, 4, 3, 2, 1])
     assert list(s) == [1, 2, 3, 4, 5]
 
+def test_typecode():
+    data = [random.randint(-10**12, 10**12) for _ in range(2000)]
+    py_s = sorted(data)
+    s = SortedMultiset(data, typecode='q')
+    assert all(type(a) is array and a.typecode == 'q' for a in s.a)
+    assert list(s) == py_s
+    for x in data[:500]:
+        s.discard(x)
+        s.add(x)
+        s.add(x + 1)
+    assert all(type(a) is array for a in s.a)
+    assert s.ge(py_s[100]) == py_s[100]
+    lo, hi = py_s[10], py_s[20]
+    assert list(s.irange(lo, hi)) == [x for x in s if lo <= x <= hi]
+    assert all(type(a) is array for a in (s | SortedMultiset([0, 1])).a)
+    s.update(range(1000))
+    assert all(type(a) is array for a in s.a)
+    del s[10:100]
+    s = SortedMultiset(typecode='d')
+    s.add(0.5)
+    s.add(-1.5)
+    assert list(s) == [-1.5, 0.5]
+    assert all(type(a) is array and a.typecode == 'd' for a in s.a)
+    with pytest.raises(TypeError):
+        s.add('x')
+    assert list(s) == [-1.5, 0.5]
+
 def test_iter_reversed():
     s = SortedMultiset([1, 2, 2, 3, 4, 5])
     assert list(s) == [1, 2, 2, 3, 4, 5]
@@ -101,6 +135,71 @@ def test_discard():
     s = SortedMultiset()
     assert not s.discard(1)
 
+def test_update():
+    s = SortedMultiset([5, 1, 3])
+    s.update([4, 3, 2, 6, 2])
+    assert list(s) == [1, 2, 2, 3, 3, 4, 5, 6]
+    s.update([])
+    assert len(s) == 8
+    s = SortedMultiset()
+    s.update([2, 1])
+    assert list(s) == [1, 2]
+
+    s = SortedMultiset(range(0, 1000, 3))
+    py_s = list(range(0, 1000, 3))
+    for k in [1, 5, 50, 500, 5000]:
+        batch = [random.randint(0, 2000) for _ in range(k)]
+        s.update(batch)
+        py_s = sorted(py_s + batch)
+        assert list(s) == py_s
+        assert s.maxes == [a[-1] for a in s.a]
+        assert all(s[i] == py_s[i] for i in range(0, len(py_s), 37))
+    # typed buckets are merged one bucket at a time
+    s = SortedMultiset(range(0, 1000, 3), typecode='q')
+    py_s = list(range(0, 1000, 3))
+    for k in [50, 500, 5000]:
+        batch = [random.randint(-100, 2000) for _ in range(k)]
+        s.update(batch)
+        py_s = sorted(py_s + batch)
+        assert list(s) == py_s and all(a.typecode == 'q' for a in s.a)
+        assert s.maxes == [a[-1] for a in s.a]
+    s = SortedMultiset(range(0, 200000, 2), typecode='q')
+    batch = list(range(1, 100000, 4))
+    tracemalloc.start()
+    s.update(batch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * 8 * len(s) and len(s) == 125000
+
+def test_multiset_operations():
+    for _ in range(50):
+        x = [random.randint(0, 30) for _ in range(random.randint(0, 100))]
+        y = [random.randint(0, 30) for _ in range(random.randint(0, 100))]
+        cx, cy = Counter(x), Counter(y)
+        s, t = SortedMultiset(x), SortedMultiset(y)
+        assert list(s + t) == sorted((cx + cy).elements())
+        assert list(s | t) == sorted((cx | cy).elements())
+        assert list(s & t) == sorted((cx & cy).elements())
+        assert list(s - t) == sorted((cx - cy).elements())
+        assert s.issubset(t) == all(cx[k] <= cy[k] for k in cx)
+        assert s.issuperset(t) == all(cy[k] <= cx[k] for k in cy)
+        assert s.isdisjoint(t) == (not cx & cy)
+        u = SortedMultiset(x)
+        u += t
+        assert list(u) == sorted((cx + cy).elements())
+        u -= t
+        assert list(u) == sorted(x)
+        u |= t
+        assert list(u) == sorted((cx | cy).elements())
+        u &= s
+        assert list(u) == sorted(x)
+        assert u.maxes == [a[-1] for a in u.a]
+    class Sub(SortedMultiset): pass
+    s = Sub([1], bucket_ratio=4)
+    s.MERGE_RATIO = 2
+    for u in (s + Sub([2]), s | Sub([2]), s & Sub([1]), s - Sub([2])):
+        assert type(u) is Sub and (u.BUCKET_RATIO, u.MERGE_RATIO) == (4, 2)
+
 def test_lt_le_gt_ge():
     s = SortedMultiset([10, 20, 30, 30, 40, 50])
     assert s.lt(30) == 20
@@ -123,6 +222,77 @@ def test_lt_le_gt_ge():
     assert s.gt(55) is None
     assert s.ge(55) is None
 
+def test_irange_islice():
+    data = [random.randint(0, 300) for _ in range(1000)]
+    s = SortedMultiset(data)
+    py_s = sorted(data)
+    for _ in range(200):
+        lo, hi = random.randint(-10, 310), random.randint(-10, 310)
+        for inc in [(True, True), (True, False), (False, True), (False, False)]:
+            expected = [x for x in py_s if (lo <= x if inc[0] else lo < x) and (x <= hi if inc[1] else x < hi)]
+            assert list(s.irange(lo, hi, inc)) == expected
+            assert list(s.irange(lo, hi, inc, reverse=True)) == expected[::-1]
+        assert list(s.irange(lo)) == [x for x in py_s if lo <= x]
+        assert list(s.irange(hi=hi)) == [x for x in py_s if x <= hi]
+        i, j = random.randint(-len(py_s) - 5, len(py_s) + 5), random.randint(-len(py_s) - 5, len(py_s) + 5)
+        assert list(s.islice(i, j)) == py_s[i:j]
+        assert list(s.islice(i, j, reverse=True)) == py_s[i:j][::-1]
+    assert list(s.islice()) == py_s
+    assert list(s.irange()) == py_s
+    assert list(SortedMultiset().irange(1, 2)) == []
+    assert list(SortedMultiset().islice(0, 2)) == []
+
+def test_discard_range_delitem():
+    for _ in range(100):
+        data = [random.randint(0, 300) for _ in range(random.randint(0, 1000))]
+        s = SortedMultiset(data)
+        py_s = sorted(data)
+        lo, hi = random.randint(-10, 310), random.randint(-10, 310)
+        inc = (random.random() < 0.5, random.random() < 0.5)
+        kept = [x for x in py_s if not ((lo <= x if inc[0] else lo < x) and (x <= hi if inc[1] else x < hi))]
+        assert s.discard_range(lo, hi, inc) == len(py_s) - len(kept)
+        assert list(s) == kept and len(s) == len(kept)
+        assert s.maxes == [a[-1] for a in s.a] and all(s.a)
+        py_s = kept
+        i, j = random.randint(-len(py_s) - 5, len(py_s) + 5), random.randint(-len(py_s) - 5, len(py_s) + 5)
+        del s[i:j]
+        del py_s[i:j]
+        assert list(s) == py_s
+        assert s.maxes == [a[-1] for a in s.a] and all(s.a)
+        if py_s:
+            i = random.randint(-len(py_s), len(py_s) - 1)
+            del s[i]
+            del py_s[i]
+        del s[::3]
+        del py_s[::3]
+        assert list(s) == py_s
+        assert all(s[k] == py_s[k] for k in range(len(py_s)))
+    s = SortedMultiset([1, 2, 3])
+    assert s.discard_range() == 3
+    assert len(s) == 0 and s.a == []
+
+def test_batch_queries():
+    for n in [0, 1, 10, 1000]:
+        s = SortedMultiset(random.randint(0, 500) for _ in range(n))
+        q = [random.randint(-10, 510) for _ in range(300)]
+        assert s.contains_many(q) == [x in s for x in q]
+        assert s.index_many(q) == [s.index(x) for x in q]
+        assert s.index_right_many(q) == [s.index_right(x) for x in q]
+        assert s.lt_many(q) == [s.lt(x) for x in q]
+        assert s.le_many(q) == [s.le(x) for x in q]
+        assert s.gt_many(q) == [s.gt(x) for x in q]
+        assert s.ge_many(iter(q)) == [s.ge(x) for x in q]
+
+def test_batch_queries_numpy():
+    np = pytest.importorskip("numpy")
+    s = SortedMultiset(random.randint(0, 500) for _ in range(1000))
+    q = np.array([random.randint(-10, 510) for _ in range(300)])
+    assert s.contains_many(q).tolist() == [x in s for x in q.tolist()]
+    assert s.index_many(q).tolist() == [s.index(x) for x in q.tolist()]
+    assert s.index_right_many(q).tolist() == [s.index_right(x) for x in q.tolist()]
+    assert s.ge_many(q) == [s.ge(x) for x in q.tolist()]
+    assert s.le_many(q) == [s.le(x) for x in q.tolist()]
+
 def test_getitem():
     s = SortedMultiset([10, 20, 30, 30, 40, 50])
     assert s[0] == 10
@@ -186,6 +356,37 @@ def test_stress():
         assert val == py_s.pop(idx)
         assert list(s) == py_s
 
+def test_maxes():
+    s = SortedMultiset(range(0, 200, 2))
+    assert s.maxes == [a[-1] for a in s.a]
+    for x in range(-1, 202):
+        s.add(x)
+        assert s.maxes == [a[-1] for a in s.a]
+    for _ in range(len(s)):
+        s.pop(random.randint(0, len(s) - 1))
+        assert s.maxes == [a[-1] for a in s.a]
+    assert s.maxes == []
+
+def test_tree():
+    s = SortedMultiset(range(0, 2000, 2))
+    py_s = list(range(0, 2000, 2))
+    for _ in range(3000):
+        val = random.randint(0, 2000)
+        if random.random() < 0.5:
+            if s.add(val) is not False:
+                py_s.append(val)
+                py_s.sort()
+        elif py_s:
+            idx = random.randint(-len(py_s), len(py_s) - 1)
+            assert s.pop(idx) == py_s.pop(idx)
+        if py_s:
+            idx = random.randint(0, len(py_s) - 1)
+            assert s[idx] == py_s[idx]
+        assert s.index(val) == bisect_left(py_s, val)
+        assert s.index_right(val) == bisect_right(py_s, val)
+        if s.tree is not None:
+            assert s.tree == SortedMultiset._build_tree(s)
+
 def test_empty_set_operations():
     s = SortedMultiset()
     assert s.lt(10) is None
@@ -245,6 +446,234 @@ def test_bucket_merge():
         SortedMultiset.BUCKET_RATIO = original_bucket_ratio
         SortedMultiset.SPLIT_RATIO = original_split_ratio
 
+def test_merge_small_buckets():
+    s = SortedMultiset(range(10000))
+    for x in random.sample(range(10000), 9900):
+        s.discard(x)
+        assert s.maxes == [a[-1] for a in s.a]
+    assert len(s.a) < 10
+    assert all(s[i] == x for i, x in enumerate(s))
+    s = SortedMultiset(range(10000))
+    s.discard_range(50, 9949)
+    assert list(s) == list(range(50)) + list(range(9950, 10000))
+    assert len(s.a) < 10
+    assert s.maxes == [a[-1] for a in s.a]
+
+def test_rebalance():
+    s = SortedMultiset()
+    for x in range(20000):
+        s.add(x)
+    assert s.built_size * 2 >= len(s)
+    assert len(s.a) <= 2 * len(SortedMultiset(range(20000)).a)
+    for x in range(19900):
+        s.discard(x)
+    assert s.built_size <= 2 * len(s)
+    assert len(s.a) <= 2 * len(SortedMultiset(range(100)).a)
+    assert list(s) == list(range(19900, 20000))
+    s = SortedMultiset(range(1000))
+    for x in range(1000, 1500):
+        s.add(x)
+    s.rebalance()
+    assert s.built_size == len(s) == 1500
+    assert list(map(len, s.a)) == list(map(len, SortedMultiset(range(1500)).a))
+    assert s.maxes == [a[-1] for a in s.a]
+    # typed buckets are rebuilt without boxing the elements
+    s = SortedMultiset(range(100000), typecode='q')
+    tracemalloc.start()
+    s.rebalance()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * 8 * 100000 and all(a.typecode == 'q' for a in s.a)
+
+
+def test_instance_ratios():
+    s = SortedMultiset(range(1000), bucket_ratio=1, split_ratio=2)
+    assert s.BUCKET_RATIO == 1 and s.SPLIT_RATIO == 2
+    assert SortedMultiset.BUCKET_RATIO == 16 and SortedMultiset.SPLIT_RATIO == 24
+    assert len(s.a) == 32
+    assert len(SortedMultiset(range(1000)).a) == 8
+    for x in range(1000, 2000):
+        s.add(x)
+    assert max(map(len, s.a)) <= 2 * len(s.a)
+    assert list(s) == list(range(2000))
+
+def test_stats():
+    s = SortedMultiset(range(1000))
+    assert s.stats() == {'size': 1000, 'buckets': 8, 'histogram': {64: 8}}
+    s.enable_stats()
+    assert '_insert' in s.__dict__ and '_insert' not in SortedMultiset(range(10)).__dict__
+    for x in range(1000):
+        s.add(x)
+    st = s.stats()
+    assert st['splits'] > 0 and st['shifted'] > 0 and st['lookups'] >= 1000
+    assert st['buckets'] == len(s.a) and sum(st['histogram'].values()) == len(s.a)
+    assert s[1000] == 500 and s.index(500) == 1000
+    for x in range(950):
+        s.discard(x)
+        s.discard(x)
+    st = s.stats()
+    assert st['merges'] > 0 and st['rebuilds'] > 0
+    assert list(s) == sorted(list(range(950, 1000)) * 2)
+    s.disable_stats()
+    assert s.counters is None and '_insert' not in s.__dict__
+    s.add(-1)
+    assert 'splits' not in s.stats()
+    # copy-on-write buckets are replaced by a copy on insertion
+    s = SortedMultiset(range(1000))
+    s.enable_stats()
+    s.copy()
+    s.add(1000)
+    s.add(-1)
+    assert s.counters['shifted'] == len(s.a[0]) - 1 and s.counters['splits'] == 0
+
+def test_pickle():
+    s = SortedMultiset([x // 2 for x in range(3000)], split_ratio=3)
+    s.enable_stats()
+    t = pickle.loads(pickle.dumps(s))
+    assert t.a == s.a and t.maxes == s.maxes and t.counters is None and t.SPLIT_RATIO == 3
+    assert list(t) == list(s) and t.count(10) == 2
+    s = SortedMultiset([1.5, 1.5, 2.5], typecode='d')
+    t = pickle.loads(pickle.dumps(s))
+    assert t.typecode == 'd' and list(t) == [1.5, 1.5, 2.5]
+
+def test_pickle_old_format():
+    # the previous release pickled only a and size
+    t = SortedMultiset.__new__(SortedMultiset)
+    t.__setstate__({'a': [[0, 2, 2], [6, 8]], 'size': 5})
+    t.add(2)
+    assert t.discard(0) and t.pop() == 8
+    assert t[1] == 2 and t.index(6) == 3 and t.count(2) == 3 and list(t.copy()) == [2, 2, 2, 6]
+
+def test_dump_load():
+    s = SortedMultiset(x % 100 for x in range(5000))
+    f = io.BytesIO()
+    s.dump(f, 'h')
+    f.seek(0)
+    t = SortedMultiset.load(f)
+    assert list(t) == list(s) and t.typecode is None
+    f = io.BytesIO()
+    SortedSet(range(10), typecode='q').dump(f)
+    f.seek(0)
+    t = SortedMultiset.load(f)
+    assert type(t) is SortedMultiset and t.typecode == 'q' and list(t) == list(range(10))
+
+def test_copy_on_write():
+    s = SortedMultiset([x // 2 for x in range(4000)])
+    t = s.copy()
+    assert t == s and all(x is y for x, y in zip(s.a, t.a))
+    snap = t.snapshot()
+    py_s, py_t = list(s), list(s)
+    for _ in range(3000):
+        x = random.randrange(2000)
+        for u, py_u in [(s, py_s), (t, py_t)]:
+            if random.random() < 0.5:
+                u.add(x)
+                py_u.append(x)
+            elif u.discard(x): py_u.remove(x)
+    assert list(s) == sorted(py_s) and list(t) == sorted(py_t)
+    assert list(snap) == [x // 2 for x in range(4000)]
+    del t[:]
+    assert len(t) == 0 and list(snap) == [x // 2 for x in range(4000)]
+
+def test_from_sorted():
+    s = SortedMultiset.from_sorted(x // 3 for x in range(300))
+    assert list(s) == [x // 3 for x in range(300)] and type(s) is SortedMultiset
+    assert s.maxes == [b[-1] for b in s.a]
+    s = SortedMultiset.from_sorted([1.5, 1.5], typecode='d')
+    assert type(s.a[0]) is array and list(s) == [1.5, 1.5]
+    b = [2, 1, 2]
+    assert list(SortedMultiset(b)) == [1, 2, 2] and b == [2, 1, 2]
+
+def test_sums():
+    s = SortedMultiset(random.randrange(300) for _ in range(2000))
+    py = sorted(s)
+    assert s.prefix_sum(0) == 0 and s.prefix_sum(10**9) == sum(py)
+    for _ in range(3000):
+        op = random.randrange(5)
+        x = random.randrange(-10, 310)
+        if op == 0:
+            s.add(x)
+            py.insert(bisect_right(py, x), x)
+        elif op == 1:
+            if s.discard(x): py.remove(x)
+        elif op == 2 and py:
+            i = random.randrange(len(py))
+            assert s.pop(i) == py.pop(i)
+        elif op == 3:
+            k = random.randrange(len(py) + 1)
+            assert s.prefix_sum(k) == sum(py[:k])
+            assert s.sum_below(x) == sum(y for y in py if y < x)
+        else:
+            y = random.randrange(-10, 310)
+            inclusive = (random.random() < 0.5, random.random() < 0.5)
+            assert s.range_sum(x, y, inclusive) == sum(z for z in py if (x <= z if inclusive[0] else x < z) and (z <= y if inclusive[1] else z < y))
+        if random.random() < 0.01:
+            del s[10:100]
+            del py[10:100]
+        assert s.sums is None or s.sums == [sum(a) for a in s.a]
+    assert s.sums is None or s.sums == [sum(a) for a in s.a]
+    assert s.range_sum() == sum(py) and s.range_sum(hi=100) == sum(y for y in py if y <= 100)
+    t = s.copy()
+    t.add(1000)
+    assert s.prefix_sum(len(s)) == sum(py) and t.prefix_sum(len(t)) == sum(py) + 1000
+    assert SortedMultiset().prefix_sum(3) == 0 and SortedMultiset().range_sum(1, 2) == 0
+
+def test_sums_monoid():
+    s = SortedMultiset(range(100))
+    s.set_monoid(max, -1)
+    assert s.prefix_sum(10) == 9 and s.sum_below(50) == 49 and s.range_sum(hi=-5) == -1
+    s.set_monoid(lambda x, y: y, None)  # the last element: not commutative
+    for x in range(100, 3000):
+        s.add(x)
+    for x in range(0, 2000, 2):
+        s.discard(x)
+    assert s.prefix_sum(1) == 1 and s.range_sum(500, 1500, (True, False)) == 1499 and s.sum_below(2500) == 2499
+
+def test_neighbors():
+    s = SortedMultiset()
+    py = []
+    for _ in range(3000):
+        x = random.randrange(300)
+        i = bisect_left(py, x)
+        j = i + (i < len(py) and py[i] == x)
+        expected = (py[i - 1] if i else None, py[j] if j < len(py) else None, i)
+        assert s.neighbors(x) == expected
+        if random.random() < 0.6:
+            assert s.add_with_neighbors(x) == (expected[0], py[i] if i < len(py) else None, i)
+            py.insert(i, x)
+        elif j != i:
+            assert s.discard_with_neighbors(x) == expected
+            py.pop(i)
+        else: assert s.discard_with_neighbors(x) is None
+    assert list(s) == py
+
+def test_observer():
+    s = SortedMultiset([1, 1, 5])
+    events = []
+    s.observer = lambda p, x, n, added: events.append((p, x, n, added))
+    s |= SortedMultiset([1, 1, 1, 3])
+    assert list(s) == [1, 1, 1, 3, 5] and events == [(None, 1, 1, True), (1, 3, 5, True)]
+    events.clear()
+    s -= SortedMultiset([1, 5])
+    assert list(s) == [1, 1, 3] and events == [(None, 1, 1, False), (3, 5, None, False)]
+    events.clear()
+    s &= SortedMultiset([1, 3, 3])
+    assert list(s) == [1, 3] and events == [(None, 1, 1, False)]
+
+def test_cursor():
+    s = SortedMultiset([1, 2, 2, 2, 3] * 100)
+    c = s.find(2)
+    assert c.value == 2 and c.rank == 100
+    values = [c.value]
+    while c.next() is not None: values.append(c.value)
+    assert values == [2] * 300 + [3] * 100
+    c = s.cursor_at(150)
+    assert c.delete() == 2 and c.value == 2 and c.rank == 150 and s.count(2) == 299
+    for _ in range(249): c.delete()
+    assert c.value == 3 and c.prev() == 2 and s.count(2) == 50
+    c = s.cursor_at(len(s))
+    assert c.value is None and c.prev() == 3
+
 def test_large_random_ops():
     s = SortedMultiset()
     py_s = []
@@ -1,12 +1,18 @@
+import io
+import pickle
 import pytest
 import sys
 import os
 import random
+import tracemalloc
+from array import array
+from bisect import bisect_left, bisect_right
 
 # Add the parent directory to the path to import SortedSet
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from SortedSet import SortedSet
+from SortedMultiset import SortedMultiset
 
 def test_init():
     s = SortedSet([1, 4, 3, 2, 5])
@@ -18,6 +24,33 @@ def test_init():
     s = SortedSet([5, 4, 3, 2, 1])
     assert list(s) == [1, 2, 3, 4, 5]
 
+def test_typecode():
+    data = [random.randint(-10**12, 10**12) for _ in range(2000)]
+    py_s = sorted(set(data))
+    s = SortedSet(data, typecode='q')
+    assert all(type(a) is array and a.typecode == 'q' for a in s.a)
+    assert list(s) == py_s
+    for x in data[:500]:
+        s.discard(x)
+        s.add(x)
+        s.add(x + 1)
+    assert all(type(a) is array for a in s.a)
+    assert s.ge(py_s[100]) == py_s[100]
+    lo, hi = py_s[10], py_s[20]
+    assert list(s.irange(lo, hi)) == [x for x in s if lo <= x <= hi]
+    assert all(type(a) is array for a in (s | SortedSet([0, 1])).a)
+    s.update(range(1000))
+    assert all(type(a) is array for a in s.a)
+    del s[10:100]
+    s = SortedSet(typecode='d')
+    s.add(0.5)
+    s.add(-1.5)
+    assert list(s) == [-1.5, 0.5]
+    assert all(type(a) is array and a.typecode == 'd' for a in s.a)
+    with pytest.raises(TypeError):
+        s.add('x')
+    assert list(s) == [-1.5, 0.5]
+
 def test_iter_reversed():
     s = SortedSet([1, 2, 3, 4, 5])
     assert list(s) == [1, 2, 3, 4, 5]
@@ -88,6 +121,72 @@ def test_discard():
     s = SortedSet()
     assert not s.discard(1)
 
+def test_update():
+    s = SortedSet([5, 1, 3])
+    s.update([4, 3, 2, 6, 2])
+    assert list(s) == [1, 2, 3, 4, 5, 6]
+    s.update([])
+    assert len(s) == 6
+    s = SortedSet()
+    s.update([2, 1])
+    assert list(s) == [1, 2]
+
+    s = SortedSet(range(0, 1000, 3))
+    py_s = list(range(0, 1000, 3))
+    for k in [1, 5, 50, 500, 5000]:
+        batch = [random.randint(0, 2000) for _ in range(k)]
+        s.update(batch)
+        py_s = sorted(set(py_s + batch))
+        assert list(s) == py_s
+        assert s.maxes == [a[-1] for a in s.a]
+        assert all(s[i] == py_s[i] for i in range(0, len(py_s), 37))
+    # typed buckets are merged one bucket at a time
+    s = SortedSet(range(0, 1000, 3), typecode='q')
+    py_s = list(range(0, 1000, 3))
+    for k in [50, 500, 5000]:
+        batch = [random.randint(-100, 2000) for _ in range(k)]
+        s.update(batch)
+        py_s = sorted(set(py_s + batch))
+        assert list(s) == py_s and all(a.typecode == 'q' for a in s.a)
+        assert s.maxes == [a[-1] for a in s.a]
+    s = SortedSet(range(0, 200000, 2), typecode='q')
+    batch = list(range(1, 100000, 4))
+    tracemalloc.start()
+    s.update(batch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * 8 * len(s) and len(s) == 125000
+
+def test_set_operations():
+    for _ in range(50):
+        x = set(random.sample(range(200), random.randint(0, 100)))
+        y = set(random.sample(range(200), random.randint(0, 100)))
+        s, t = SortedSet(x), SortedSet(y)
+        assert list(s | t) == sorted(x | y)
+        assert list(s & t) == sorted(x & y)
+        assert list(s - t) == sorted(x - y)
+        assert list(s ^ t) == sorted(x ^ y)
+        assert s.issubset(t) == (x <= y)
+        assert s.issuperset(t) == (x >= y)
+        assert s.isdisjoint(t) == x.isdisjoint(y)
+        u = SortedSet(x)
+        u |= t
+        assert list(u) == sorted(x | y)
+        u &= s
+        assert list(u) == sorted(x)
+        u -= t
+        assert list(u) == sorted(x - y)
+        u ^= t
+        assert list(u) == sorted(x | y)
+        assert u.maxes == [a[-1] for a in u.a]
+    assert SortedSet([1, 2]).issubset([3, 2, 1])
+    assert not SortedSet([1, 4]).issubset([3, 2, 1])
+    class Sub(SortedSet): pass
+    s = Sub([1], bucket_ratio=4)
+    s.MERGE_RATIO = 2
+    for u in (s | Sub([2]), s & Sub([1]), s - Sub([2]), s ^ Sub([2])):
+        assert type(u) is Sub and (u.BUCKET_RATIO, u.MERGE_RATIO) == (4, 2)
+
 def test_lt_le_gt_ge():
     s = SortedSet([10, 20, 30, 40, 50])
     assert s.lt(30) == 20
@@ -110,6 +209,77 @@ def test_lt_le_gt_ge():
     assert s.gt(55) is None
     assert s.ge(55) is None
 
+def test_irange_islice():
+    data = [random.randint(0, 300) for _ in range(1000)]
+    s = SortedSet(data)
+    py_s = sorted(set(data))
+    for _ in range(200):
+        lo, hi = random.randint(-10, 310), random.randint(-10, 310)
+        for inc in [(True, True), (True, False), (False, True), (False, False)]:
+            expected = [x for x in py_s if (lo <= x if inc[0] else lo < x) and (x <= hi if inc[1] else x < hi)]
+            assert list(s.irange(lo, hi, inc)) == expected
+            assert list(s.irange(lo, hi, inc, reverse=True)) == expected[::-1]
+        assert list(s.irange(lo)) == [x for x in py_s if lo <= x]
+        assert list(s.irange(hi=hi)) == [x for x in py_s if x <= hi]
+        i, j = random.randint(-len(py_s) - 5, len(py_s) + 5), random.randint(-len(py_s) - 5, len(py_s) + 5)
+        assert list(s.islice(i, j)) == py_s[i:j]
+        assert list(s.islice(i, j, reverse=True)) == py_s[i:j][::-1]
+    assert list(s.islice()) == py_s
+    assert list(s.irange()) == py_s
+    assert list(SortedSet().irange(1, 2)) == []
+    assert list(SortedSet().islice(0, 2)) == []
+
+def test_discard_range_delitem():
+    for _ in range(100):
+        data = [random.randint(0, 300) for _ in range(random.randint(0, 1000))]
+        s = SortedSet(data)
+        py_s = sorted(set(data))
+        lo, hi = random.randint(-10, 310), random.randint(-10, 310)
+        inc = (random.random() < 0.5, random.random() < 0.5)
+        kept = [x for x in py_s if not ((lo <= x if inc[0] else lo < x) and (x <= hi if inc[1] else x < hi))]
+        assert s.discard_range(lo, hi, inc) == len(py_s) - len(kept)
+        assert list(s) == kept and len(s) == len(kept)
+        assert s.maxes == [a[-1] for a in s.a] and all(s.a)
+        py_s = kept
+        i, j = random.randint(-len(py_s) - 5, len(py_s) + 5), random.randint(-len(py_s) - 5, len(py_s) + 5)
+        del s[i:j]
+        del py_s[i:j]
+        assert list(s) == py_s
+        assert s.maxes == [a[-1] for a in s.a] and all(s.a)
+        if py_s:
+            i = random.randint(-len(py_s), len(py_s) - 1)
+            del s[i]
+            del py_s[i]
+        del s[::3]
+        del py_s[::3]
+        assert list(s) == py_s
+        assert all(s[k] == py_s[k] for k in range(len(py_s)))
+    s = SortedSet([1, 2, 3])
+    assert s.discard_range() == 3
+    assert len(s) == 0 and s.a == []
+
+def test_batch_queries():
+    for n in [0, 1, 10, 1000]:
+        s = SortedSet(random.randint(0, 500) for _ in range(n))
+        q = [random.randint(-10, 510) for _ in range(300)]
+        assert s.contains_many(q) == [x in s for x in q]
+        assert s.index_many(q) == [s.index(x) for x in q]
+        assert s.index_right_many(q) == [s.index_right(x) for x in q]
+        assert s.lt_many(q) == [s.lt(x) for x in q]
+        assert s.le_many(q) == [s.le(x) for x in q]
+        assert s.gt_many(q) == [s.gt(x) for x in q]
+        assert s.ge_many(iter(q)) == [s.ge(x) for x in q]
+
+def test_batch_queries_numpy():
+    np = pytest.importorskip("numpy")
+    s = SortedSet(random.randint(0, 500) for _ in range(1000))
+    q = np.array([random.randint(-10, 510) for _ in range(300)])
+    assert s.contains_many(q).tolist() == [x in s for x in q.tolist()]
+    assert s.index_many(q).tolist() == [s.index(x) for x in q.tolist()]
+    assert s.index_right_many(q).tolist() == [s.index_right(x) for x in q.tolist()]
+    assert s.ge_many(q) == [s.ge(x) for x in q.tolist()]
+    assert s.le_many(q) == [s.le(x) for x in q.tolist()]
+
 def test_getitem():
     s = SortedSet([10, 20, 30, 40, 50])
     assert s[0] == 10
@@ -174,6 +344,37 @@ def test_stress():
         py_s = set(py_s_list)
         assert list(s) == sorted(list(py_s))
 
+def test_maxes():
+    s = SortedSet(range(0, 200, 2))
+    assert s.maxes == [a[-1] for a in s.a]
+    for x in range(-1, 202):
+        s.add(x)
+        assert s.maxes == [a[-1] for a in s.a]
+    for _ in range(len(s)):
+        s.pop(random.randint(0, len(s) - 1))
+        assert s.maxes == [a[-1] for a in s.a]
+    assert s.maxes == []
+
+def test_tree():
+    s = SortedSet(range(0, 2000, 2))
+    py_s = list(range(0, 2000, 2))
+    for _ in range(3000):
+        val = random.randint(0, 2000)
+        if random.random() < 0.5:
+            if s.add(val) is not False:
+                py_s.append(val)
+                py_s.sort()
+        elif py_s:
+            idx = random.randint(-len(py_s), len(py_s) - 1)
+            assert s.pop(idx) == py_s.pop(idx)
+        if py_s:
+            idx = random.randint(0, len(py_s) - 1)
+            assert s[idx] == py_s[idx]
+        assert s.index(val) == bisect_left(py_s, val)
+        assert s.index_right(val) == bisect_right(py_s, val)
+        if s.tree is not None:
+            assert s.tree == SortedSet._build_tree(s)
+
 def test_empty_set_operations():
     s = SortedSet()
     assert s.lt(10) is None
@@ -242,6 +443,284 @@ def test_bucket_merge():
         SortedSet.BUCKET_RATIO = original_bucket_ratio
         SortedSet.SPLIT_RATIO = original_split_ratio
 
+def test_merge_small_buckets():
+    s = SortedSet(range(10000))
+    for x in random.sample(range(10000), 9900):
+        s.discard(x)
+        assert s.maxes == [a[-1] for a in s.a]
+    assert len(s.a) < 10
+    assert all(s[i] == x for i, x in enumerate(s))
+    s = SortedSet(range(10000))
+    s.discard_range(50, 9949)
+    assert list(s) == list(range(50)) + list(range(9950, 10000))
+    assert len(s.a) < 10
+    assert s.maxes == [a[-1] for a in s.a]
+
+def test_rebalance():
+    s = SortedSet()
+    for x in range(20000):
+        s.add(x)
+    assert s.built_size * 2 >= len(s)
+    assert len(s.a) <= 2 * len(SortedSet(range(20000)).a)
+    for x in range(19900):
+        s.discard(x)
+    assert s.built_size <= 2 * len(s)
+    assert len(s.a) <= 2 * len(SortedSet(range(100)).a)
+    assert list(s) == list(range(19900, 20000))
+    s = SortedSet(range(1000))
+    for x in range(1000, 1500):
+        s.add(x)
+    s.rebalance()
+    assert s.built_size == len(s) == 1500
+    assert list(map(len, s.a)) == list(map(len, SortedSet(range(1500)).a))
+    assert s.maxes == [a[-1] for a in s.a]
+    # typed buckets are rebuilt without boxing the elements
+    s = SortedSet(range(100000), typecode='q')
+    tracemalloc.start()
+    s.rebalance()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * 8 * 100000 and all(a.typecode == 'q' for a in s.a)
+
+
+def test_instance_ratios():
+    s = SortedSet(range(1000), bucket_ratio=1, split_ratio=2)
+    assert s.BUCKET_RATIO == 1 and s.SPLIT_RATIO == 2
+    assert SortedSet.BUCKET_RATIO == 16 and SortedSet.SPLIT_RATIO == 24
+    assert len(s.a) == 32
+    assert len(SortedSet(range(1000)).a) == 8
+    for x in range(1000, 2000):
+        s.add(x)
+    assert max(map(len, s.a)) <= 2 * len(s.a)
+    assert list(s) == list(range(2000))
+
+def test_stats():
+    s = SortedSet(range(0, 2000, 2))
+    assert s.stats() == {'size': 1000, 'buckets': 8, 'histogram': {64: 8}}
+    s.enable_stats()
+    assert '_insert' in s.__dict__ and '_insert' not in SortedSet(range(10)).__dict__
+    for x in range(1, 2000, 2):
+        s.add(x)
+    assert not s.add(1)
+    st = s.stats()
+    assert st['splits'] > 0 and st['shifted'] > 0 and st['lookups'] >= 1001
+    assert st['buckets'] == len(s.a) and sum(st['histogram'].values()) == len(s.a)
+    assert s[1000] == 1000 and s.index(1000) == 1000
+    for x in range(1900):
+        s.discard(x)
+    st = s.stats()
+    assert st['merges'] > 0 and st['rebuilds'] > 0
+    assert list(s) == list(range(1900, 2000))
+    s.enable_stats()
+    assert set(s.counters.values()) == {0}
+    s.disable_stats()
+    assert s.counters is None and '_insert' not in s.__dict__
+    s.add(-1)
+    assert 'splits' not in s.stats()
+    # copy-on-write buckets are replaced by a copy on insertion
+    s = SortedSet(range(1000))
+    s.enable_stats()
+    s.copy()
+    s.add(1000)
+    s.add(-1)
+    assert s.counters['shifted'] == len(s.a[0]) - 1 and s.counters['splits'] == 0
+
+def test_pickle():
+    s = SortedSet(range(0, 3000, 3), bucket_ratio=4)
+    for x in range(1, 500, 3):
+        s.add(x)
+    s[100]
+    s.enable_stats()
+    t = pickle.loads(pickle.dumps(s))
+    assert t.a == s.a and t.maxes == s.maxes and t.tree is None and t.counters is None
+    assert t.BUCKET_RATIO == 4 and t.built_size == s.built_size
+    assert list(t) == list(s) and t[100] == s[100]
+    t.add(-1)
+    assert t.maxes == [a[-1] for a in t.a]
+    s = SortedSet(range(100), typecode='q')
+    t = pickle.loads(pickle.dumps(s))
+    assert t.typecode == 'q' and all(type(a) is array for a in t.a) and list(t) == list(range(100))
+
+def test_pickle_old_format():
+    # the previous release pickled only a and size
+    t = SortedSet.__new__(SortedSet)
+    t.__setstate__({'a': [[0, 2, 4], [6, 8]], 'size': 5})
+    assert t.add(5) and t.discard(0) and t.pop() == 8
+    assert t[1] == 4 and t.index(5) == 2 and list(t.copy()) == [2, 4, 5, 6]
+
+def test_dump_load():
+    for s in [SortedSet(), SortedSet(range(-5000, 5000, 7)), SortedSet([x / 4 for x in range(100)]), SortedSet(range(1000), typecode='i')]:
+        typecode = 'd' if s and type(s[0]) is float else 'q'
+        f = io.BytesIO()
+        s.dump(f, typecode)
+        f.seek(0)
+        t = SortedSet.load(f)
+        assert list(t) == list(s) and type(t) is SortedSet
+        assert t.typecode == s.typecode and t.maxes == [a[-1] for a in t.a]
+        assert len(f.getvalue()) == SortedSet.HEADER.size + len(s) * array(s.typecode or typecode).itemsize
+    with pytest.raises(TypeError):
+        SortedSet([0.5]).dump(io.BytesIO())
+    f = io.BytesIO()
+    SortedMultiset([1, 1]).dump(f)
+    f.seek(0)
+    with pytest.raises(ValueError):
+        SortedSet.load(f)
+
+def test_copy_on_write():
+    s = SortedSet(range(0, 4000, 2), bucket_ratio=4)
+    s[1000]
+    t = s.copy()
+    assert t == s and t is not s and t.BUCKET_RATIO == 4
+    assert all(x is y for x, y in zip(s.a, t.a)) and s.a is not t.a and s.maxes is not t.maxes
+    t.add(1)
+    assert s.a[0] is not t.a[0] and s.a[1] is t.a[1]
+    assert 1 not in s and 1 in t
+    snap = s.snapshot()
+    py_s, py_snap, py_t = set(s), set(s), set(t)
+    for _ in range(3000):
+        x = random.randrange(4000)
+        for u, py_u in [(s, py_s), (t, py_t)]:
+            if random.random() < 0.5:
+                u.add(x)
+                py_u.add(x)
+            else:
+                u.discard(x)
+                py_u.discard(x)
+    del s[10:500]
+    py_s = set(sorted(py_s)[:10] + sorted(py_s)[500:])
+    assert list(s) == sorted(py_s) and list(t) == sorted(py_t) and list(snap) == sorted(py_snap)
+    assert all(s[i] == x for i, x in enumerate(sorted(py_s)))
+    s = SortedSet(range(100), typecode='q')
+    t = s.copy()
+    t.discard(50)
+    assert type(t.a[0]) is array and 50 in s and 50 not in t
+
+def test_from_sorted():
+    a = [1, 1, 2, 3, 3, 3, 7]
+    s = SortedSet.from_sorted(iter(a))
+    assert list(s) == [1, 2, 3, 7] and type(s) is SortedSet
+    s = SortedSet.from_sorted_unique((x * 2 for x in range(1000)), bucket_ratio=4)
+    assert list(s) == list(range(0, 2000, 2)) and s.BUCKET_RATIO == 4
+    assert s.maxes == [b[-1] for b in s.a] and len(s.a) == len(SortedSet(range(1000), bucket_ratio=4).a)
+    s = SortedSet.from_sorted(range(100), typecode='q')
+    assert type(s.a[0]) is array and list(s) == list(range(100))
+    assert list(SortedSet.from_sorted([])) == []
+    b = [3, 1, 2, 1, 3]
+    assert list(SortedSet(b)) == [1, 2, 3] and b == [3, 1, 2, 1, 3]
+    assert list(SortedSet([1, 2, 2, 3])) == [1, 2, 3]
+
+def test_sums():
+    s = SortedSet(range(0, 1000, 3))
+    py = list(s)
+    assert s.prefix_sum(10) == sum(py[:10])
+    for x in random.sample(range(2000), 1500):
+        if s.add(x):
+            py.insert(bisect_left(py, x), x)
+        k = random.randrange(len(py) + 1)
+        assert s.prefix_sum(k) == sum(py[:k])
+    s.discard_range(100, 1800)
+    py = [x for x in py if not 100 <= x <= 1800]
+    assert s.range_sum(50, 1900) == sum(x for x in py if 50 <= x <= 1900)
+    assert s.sum_below(1850) == sum(x for x in py if x < 1850)
+    assert s.sums is None or s.sums == [sum(a) for a in s.a]
+
+def test_neighbors():
+    s = SortedSet()
+    assert s.neighbors(5) == (None, None, 0) and s.discard_with_neighbors(5) is None
+    assert s.add_with_neighbors(5) == (None, None, 0)
+    py = [5]
+    for x in random.sample(range(3000), 2000):
+        i = bisect_left(py, x)
+        expected = (py[i - 1] if i else None, py[i + (i < len(py) and py[i] == x)] if i + (i < len(py) and py[i] == x) < len(py) else None, i)
+        assert s.neighbors(x) == expected
+        if x in py:
+            assert s.add_with_neighbors(x) is None
+            assert s.discard_with_neighbors(x) == expected
+            py.pop(i)
+        else:
+            assert s.add_with_neighbors(x) == expected
+            py.insert(i, x)
+    assert list(s) == py
+
+def test_observer():
+    # maintain the adjacent differences as in example/ABC308-G.py
+    s = SortedSet([10, 20])
+    diffs = SortedMultiset([10])
+    def observer(p, x, n, added):
+        f, g = (diffs.add, diffs.discard) if added else (diffs.discard, diffs.add)
+        if p is not None and n is not None: g(n - p)
+        if p is not None: f(x - p)
+        if n is not None: f(n - x)
+    s.observer = observer
+    for _ in range(2000):
+        x = random.randrange(1000)
+        op = random.randrange(4)
+        if op == 0: s.add(x)
+        elif op == 1: s.discard(x)
+        elif op == 2 and s: s.pop(random.randrange(len(s)))
+        elif random.random() < 0.05:
+            s.update(random.sample(range(1000), 5))
+            del s[3:6]
+        elif random.random() < 0.1:
+            t = SortedSet(random.sample(range(1000), 10))
+            op = random.randrange(4)
+            if op == 0: s |= t
+            elif op == 1: s -= t
+            elif op == 2: s ^= t
+            else: s &= t | SortedSet(list(s)[::2])
+        a = list(s)
+        assert list(diffs) == sorted(y - x for x, y in zip(a, a[1:]))
+
+def test_cursor():
+    s = SortedSet(range(0, 1000, 2))
+    c = s.find(101)
+    assert c.value == 102 and c.rank == 51 and c.valid()
+    assert [c.next() for _ in range(3)] == [104, 106, 108]
+    assert [c.prev() for _ in range(4)] == [106, 104, 102, 100]
+    c = s.cursor_at(0)
+    assert c.prev() is None and c.value == 0
+    values = [c.value]
+    while c.next() is not None: values.append(c.value)
+    assert values == list(s) and c.value is None and c.rank == len(s)
+    assert c.prev() == 998 and c.next() is None and c.next() is None
+    assert s.find(999).value is None and s.cursor_at(-1).value == 998
+    with pytest.raises(IndexError):
+        s.cursor_at(501)
+    # delete and step like an order book
+    c = s.find(500)
+    assert c.delete() == 500 and c.value == 502 and 500 not in s
+    for _ in range(100): c.delete()
+    assert c.value == 702 and s.index(702) == 250 and c.rank == 250
+    c = s.cursor_at(-1)
+    assert c.delete() == 998 and c.value is None
+    # modifications elsewhere
+    c = s.find(300)
+    for x in range(301, 1000, 2): s.add(x)
+    s.discard(301)
+    assert c.next() == 302 and c.valid() and c.prev() == 300 and c.prev() == 298
+    s.discard(298)
+    assert c.next() == 300 and c.rank == s.index(300)
+    s.discard(300)
+    with pytest.raises(KeyError):
+        c.delete()
+    assert c.value == 300 and c.rank == s.index(300) and c.value == 300
+    for x in range(300): s.discard(x)
+    assert c.prev() is None and c.value == 300 and c.next() == 302
+    s = SortedSet(range(1000))
+    c = s.find(0)
+    py = list(range(1000))
+    for _ in range(3000):
+        op = random.randrange(3)
+        if op == 0 and c.value is not None:
+            py.remove(c.delete())
+        elif op == 1: c.next()
+        else: c.prev()
+        if random.random() < 0.05:
+            x = random.randrange(1000)
+            if s.discard(x): py.remove(x)
+        expected = bisect_left(py, c.value) if c.value is not None else len(py)
+        assert c.rank == expected and list(s) == py
+
 def test_large_random_ops():
     s = SortedSet()
     py_s = set()